@@ -5,39 +5,67 @@ Advanced visualization components and data processing for anomaly detection.
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
-from collections import defaultdict
+from collections import Counter, defaultdict
+from functools import lru_cache
 import math
 
+from .models import SEVERITY_LEVELS, SEVERITY_RANK
+
+
+# Severity ranks keyed by lowercase name, so stored values match in any case
+_SEVERITY_RANK_BY_LOWER = {severity.lower(): rank for severity, rank in SEVERITY_RANK.items()}
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(timestamp: str):
+    """Parse an ISO timestamp to a date, memoized for repeated timestamps."""
+    return datetime.fromisoformat(timestamp).date()
+
 
 class VisualizationDataProcessor:
     """Process data for advanced visualizations."""
     
+    # Risk bucket for each (severity, is_potential_vulnerability) pair
+    RISK_BUCKET_LOOKUP = {
+        ('Critical', True): 'Critical Risk',
+        ('Critical', False): 'Critical Risk',
+        ('High', True): 'Critical Risk',
+        ('High', False): 'High Risk',
+        ('Medium', True): 'High Risk',
+        ('Medium', False): 'Medium Risk',
+        ('Low', True): 'Low Risk',
+        ('Low', False): 'Low Risk'
+    }
+    
     @staticmethod
     def prepare_timeline_data(anomalies: List[Dict]) -> List[Dict]:
         """Prepare data for timeline visualization."""
         timeline_data = []
         
-        # Group anomalies by date
-        date_groups = defaultdict(list)
+        # Count anomalies per (date, severity) in a single pass
+        date_totals = defaultdict(int)
+        date_vulns = defaultdict(int)
+        date_severities = defaultdict(lambda: defaultdict(int))
         for anomaly in anomalies:
-            if anomaly.get('created_timestamp'):
-                date = datetime.fromisoformat(anomaly['created_timestamp']).date()
-                date_groups[date].append(anomaly)
+            timestamp = anomaly.get('created_timestamp')
+            if timestamp:
+                date = _parse_date(timestamp)
+                date_totals[date] += 1
+                date_severities[date][anomaly['severity']] += 1
+                if anomaly.get('is_potential_vulnerability'):
+                    date_vulns[date] += 1
         
         # Create timeline points
-        for date, day_anomalies in sorted(date_groups.items()):
-            severity_counts = defaultdict(int)
-            for anomaly in day_anomalies:
-                severity_counts[anomaly['severity']] += 1
-            
+        for date in sorted(date_totals):
+            severity_counts = date_severities[date]
             timeline_data.append({
                 'date': date.isoformat(),
-                'total': len(day_anomalies),
+                'total': date_totals[date],
                 'critical': severity_counts['Critical'],
                 'high': severity_counts['High'],
                 'medium': severity_counts['Medium'],
                 'low': severity_counts['Low'],
-                'vulnerabilities': len([a for a in day_anomalies if a.get('is_potential_vulnerability')])
+                'vulnerabilities': date_vulns[date]
             })
         
         return timeline_data
@@ -45,23 +73,25 @@ class VisualizationDataProcessor:
     @staticmethod
     def prepare_heatmap_data(anomalies: List[Dict]) -> Dict[str, Any]:
         """Prepare data for severity/type heatmap."""
-        severity_order = ['Critical', 'High', 'Medium', 'Low', 'Info']
-        type_counts = defaultdict(lambda: defaultdict(int))
+        severity_order = SEVERITY_LEVELS
         
-        # Count anomalies by type and severity
-        for anomaly in anomalies:
-            type_counts[anomaly['type']][anomaly['severity']] += 1
+        # Count anomalies by (type, severity) in a single pass
+        pair_counts = Counter((anomaly['type'], anomaly['severity']) for anomaly in anomalies)
+        anomaly_types = list(dict.fromkeys(anomaly_type for anomaly_type, _ in pair_counts))
         
         # Prepare heatmap matrix
         heatmap_data = []
-        for anomaly_type, severity_counts in type_counts.items():
+        max_count = 0
+        for anomaly_type in anomaly_types:
             row_data = {
                 'type': anomaly_type.replace('_', ' ').title(),
                 'data': []
             }
             
             for severity in severity_order:
-                count = severity_counts.get(severity, 0)
+                count = pair_counts[(anomaly_type, severity)]
+                if count > max_count:
+                    max_count = count
                 row_data['data'].append({
                     'severity': severity,
                     'count': count,
@@ -72,11 +102,8 @@ class VisualizationDataProcessor:
         
         return {
             'data': heatmap_data,
-            'severities': severity_order,
-            'max_count': max([
-                max([cell['count'] for cell in row['data']])
-                for row in heatmap_data
-            ]) if heatmap_data else 0
+            'severities': list(severity_order),
+            'max_count': max_count
         }
     
     @staticmethod
@@ -92,22 +119,12 @@ class VisualizationDataProcessor:
         
         vulnerability_types = defaultdict(int)
         confidence_distribution = {'high': 0, 'medium': 0, 'low': 0}
+        bucket_lookup = VisualizationDataProcessor.RISK_BUCKET_LOOKUP
         
         for anomaly in anomalies:
             # Risk categorization based on severity and vulnerability status
-            severity = anomaly['severity']
-            is_vuln = anomaly.get('is_potential_vulnerability', False)
-            
-            if severity == 'Critical' or (severity == 'High' and is_vuln):
-                risk_buckets['Critical Risk'] += 1
-            elif severity == 'High' or (severity == 'Medium' and is_vuln):
-                risk_buckets['High Risk'] += 1
-            elif severity == 'Medium':
-                risk_buckets['Medium Risk'] += 1
-            elif severity == 'Low':
-                risk_buckets['Low Risk'] += 1
-            else:
-                risk_buckets['Minimal Risk'] += 1
+            is_vuln = bool(anomaly.get('is_potential_vulnerability', False))
+            risk_buckets[bucket_lookup.get((anomaly['severity'], is_vuln), 'Minimal Risk')] += 1
             
             # Vulnerability types
             if is_vuln and anomaly.get('vulnerability_type'):
@@ -134,54 +151,68 @@ class VisualizationDataProcessor:
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=days)
         
-        # Initialize daily buckets
-        daily_data = {}
-        current_date = start_date
-        while current_date <= end_date:
-            daily_data[current_date] = {
-                'date': current_date.isoformat(),
-                'total': 0,
-                'vulnerabilities': 0,
-                'critical': 0,
-                'high': 0,
-                'medium': 0,
-                'low': 0
-            }
-            current_date += timedelta(days=1)
+        # Per-day counters kept as parallel lists indexed by day offset
+        num_days = days + 1
+        totals = [0] * num_days
+        vulns = [0] * num_days
+        severity_counts = [[0] * num_days for _ in SEVERITY_LEVELS]  # Indexed by SEVERITY_RANK
         
         # Populate with actual data
         for anomaly in anomalies:
             if anomaly.get('created_timestamp'):
-                anomaly_date = datetime.fromisoformat(anomaly['created_timestamp']).date()
-                if start_date <= anomaly_date <= end_date:
-                    daily_data[anomaly_date]['total'] += 1
+                day_idx = (_parse_date(anomaly['created_timestamp']) - start_date).days
+                if 0 <= day_idx < num_days:
+                    totals[day_idx] += 1
                     
                     if anomaly.get('is_potential_vulnerability'):
-                        daily_data[anomaly_date]['vulnerabilities'] += 1
+                        vulns[day_idx] += 1
                     
-                    severity = anomaly['severity'].lower()
-                    if severity in daily_data[anomaly_date]:
-                        daily_data[anomaly_date][severity] += 1
+                    rank = _SEVERITY_RANK_BY_LOWER.get(anomaly['severity'].lower())
+                    if rank is not None:
+                        severity_counts[rank][day_idx] += 1
         
-        # Convert to list and calculate trends
-        trend_data = list(daily_data.values())
-        
-        # Calculate moving averages
+        # Build daily rows with moving averages from a running window sum,
+        # accumulating the summary totals and the peak day in the same pass
+        trend_data = []
         window_size = 7  # 7-day moving average
-        for i in range(len(trend_data)):
-            start_idx = max(0, i - window_size + 1)
-            window_data = trend_data[start_idx:i+1]
+        window_total = 0
+        window_vulns = 0
+        total_anomalies = 0
+        total_vulns = 0
+        peak_day = None
+        for i in range(num_days):
+            window_total += totals[i]
+            window_vulns += vulns[i]
+            if i >= window_size:
+                window_total -= totals[i - window_size]
+                window_vulns -= vulns[i - window_size]
+            window_len = min(i + 1, window_size)
+            
+            day = {
+                'date': (start_date + timedelta(days=i)).isoformat(),
+                'total': totals[i],
+                'vulnerabilities': vulns[i],
+                'critical': severity_counts[SEVERITY_RANK['Critical']][i],
+                'high': severity_counts[SEVERITY_RANK['High']][i],
+                'medium': severity_counts[SEVERITY_RANK['Medium']][i],
+                'low': severity_counts[SEVERITY_RANK['Low']][i],
+                'moving_avg_total': window_total / window_len,
+                'moving_avg_vulnerabilities': window_vulns / window_len
+            }
+            trend_data.append(day)
             
-            trend_data[i]['moving_avg_total'] = sum(d['total'] for d in window_data) / len(window_data)
-            trend_data[i]['moving_avg_vulnerabilities'] = sum(d['vulnerabilities'] for d in window_data) / len(window_data)
+            total_anomalies += totals[i]
+            total_vulns += vulns[i]
+            if peak_day is None or day['total'] > peak_day['total']:
+                peak_day = day
         
         return {
             'daily_data': trend_data,
             'summary': {
                 'total_period': days,
-                'total_anomalies': sum(d['total'] for d in trend_data),
-                'total_vulnerabilities': sum(d['vulnerabilities'] for d in trend_data),
-                'peak_day': max(trend_data, key=lambda x: x['total']) if trend_data else None,
+                'total_anomalies': total_anomalies,
+                'total_vulnerabilities': total_vulns,
+                'peak_day': peak_day,
                 'trend_direction': VisualizationDataProcessor._calculate_trend_direction(trend_data)
             }
         }
@@ -192,20 +223,20 @@ class VisualizationDataProcessor:
         if len(data) < 2:
             return 'stable'
         
-        # Use linear regression to determine trend
+        # Use linear regression to determine trend. The x values are the day
+        # indices 0..n-1, so their mean and squared deviations are closed-form
+        # and the slope only needs a single pass over the totals.
         n = len(data)
-        x_values = list(range(n))
-        y_values = [d['total'] for d in data]
-        
-        # Calculate slope
-        x_mean = sum(x_values) / n
-        y_mean = sum(y_values) / n
+        x_mean = (n - 1) / 2
         
-        numerator = sum((x_values[i] - x_mean) * (y_values[i] - y_mean) for i in range(n))
-        denominator = sum((x_values[i] - x_mean) ** 2 for i in range(n))
+        sum_y = 0
+        sum_xy = 0
+        for i, d in enumerate(data):
+            sum_y += d['total']
+            sum_xy += i * d['total']
         
-        if denominator == 0:
-            return 'stable'
+        numerator = sum_xy - x_mean * sum_y
+        denominator = n * (n * n - 1) / 12
         
         slope = numerator / denominator
         
@@ -227,11 +258,8 @@ class VisualizationDataProcessor:
             
             # Calculate metrics for each flow
             total_anomalies = len(anomalies)
-            vulnerabilities = len([a for a in anomalies if a.get('is_potential_vulnerability')])
-            
-            severity_counts = defaultdict(int)
-            for anomaly in anomalies:
-                severity_counts[anomaly['severity']] += 1
+            vulnerabilities = sum(1 for a in anomalies if a.get('is_potential_vulnerability'))
+            severity_counts = Counter(a['severity'] for a in anomalies)
             
             # Calculate risk score (simplified)
             risk_score = (
@@ -361,31 +389,33 @@ class ChartConfigGenerator:
         }
 
 
+# Dispatch tables for the exported functions; all handlers are staticmethods
+_VISUALIZATION_HANDLERS = {
+    'timeline': VisualizationDataProcessor.prepare_timeline_data,
+    'heatmap': VisualizationDataProcessor.prepare_heatmap_data,
+    'risk_distribution': VisualizationDataProcessor.prepare_risk_distribution_data,
+    'trend_analysis': VisualizationDataProcessor.prepare_trend_analysis_data
+}
+
+_CHART_CONFIG_HANDLERS = {
+    'timeline': ChartConfigGenerator.generate_timeline_config,
+    'risk_radar': ChartConfigGenerator.generate_risk_radar_config
+}
+
+
 # Export functions for use in API routes
 def process_visualization_data(anomalies: List[Dict], visualization_type: str) -> Dict[str, Any]:
     """Main function to process data for different visualization types."""
-    processor = VisualizationDataProcessor()
-    
-    if visualization_type == 'timeline':
-        return processor.prepare_timeline_data(anomalies)
-    elif visualization_type == 'heatmap':
-        return processor.prepare_heatmap_data(anomalies)
-    elif visualization_type == 'risk_distribution':
-        return processor.prepare_risk_distribution_data(anomalies)
-    elif visualization_type == 'trend_analysis':
-        return processor.prepare_trend_analysis_data(anomalies)
-    else:
+    handler = _VISUALIZATION_HANDLERS.get(visualization_type)
+    if handler is None:
         raise ValueError(f"Unknown visualization type: {visualization_type}")
+    return handler(anomalies)
 
 
 def generate_chart_config(data: Dict[str, Any], chart_type: str) -> Dict[str, Any]:
     """Generate chart configuration for frontend visualization libraries."""
-    generator = ChartConfigGenerator()
-    
-    if chart_type == 'timeline':
-        return generator.generate_timeline_config(data)
-    elif chart_type == 'risk_radar':
-        return generator.generate_risk_radar_config(data)
-    else:
+    handler = _CHART_CONFIG_HANDLERS.get(chart_type)
+    if handler is None:
         raise ValueError(f"Unknown chart type: {chart_type}")
+    return handler(data)
 
@@ -19,46 +19,80 @@ class ResponseAnalyzer:
     def __init__(self, db_manager: DatabaseManager):
         """Initialize with database manager."""
         self.db_manager = db_manager
-        self.detection_threshold = float(self.db_manager.get_config(
-            "anomaly_detection_threshold") or 0.7)
+        self._detection_threshold = None  # Loaded from the config on first use
         # Rules can be loaded from DB or defined here
         self.keyword_rules = []  # Example: [{"keyword": "access denied", "type": "unauthorized_access", "severity": "High"}]
         self.status_code_rules = [] # Example: [{"original": 200, "replayed": 403, "type": "unauthorized_access", "severity": "High"}]
+        # (original, replayed) -> first matching status code rule
+        self._status_code_rule_index = {}
+    
+    @property
+    def detection_threshold(self) -> float:
+        """Confidence threshold for anomaly detection, cached after the first lookup."""
+        if self._detection_threshold is None:
+            self._detection_threshold = float(self.db_manager.get_config(
+                "anomaly_detection_threshold") or 0.7)
+        return self._detection_threshold
     
     def analyze_flow(self, flow_id: int) -> int:
         """Analyze all replayed responses for a flow. Returns count of anomalies found."""
         try:
-            test_cases = self.db_manager.get_test_cases(flow_id=flow_id)
-            anomalies_found = 0
-            for tc in test_cases:
-                anomalies = self.analyze_test_case(tc.test_case_id)
-                anomalies_found += len(anomalies)
-            return anomalies_found
+            # Read the flow and store its anomalies in a single transaction
+            with self.db_manager.transaction():
+                test_cases = self.db_manager.get_test_cases(flow_id=flow_id, include_body=False)
+                # Load the flow's requests and replayed responses up front rather
+                # than issuing two queries per test case
+                requests = {req.request_id: req for req in self.db_manager.get_requests(flow_id)}
+                responses = self.db_manager.get_replayed_responses(flow_id)
+                # Each original body is lowered once and shared by all test cases of its request
+                original_contents_lower = {
+                    request_id: req.response_content.lower() if req.response_content else b""
+                    for request_id, req in requests.items()
+                }
+                anomalies = []
+                for tc in test_cases:
+                    original_request = requests.get(tc.request_id) or self.db_manager.get_request(tc.request_id)
+                    anomalies.extend(self._detect_anomalies(
+                        tc, original_request, responses.get(tc.test_case_id),
+                        original_contents_lower.get(tc.request_id)))
+                return len(self.db_manager.add_anomalies(anomalies))
         except Exception as e:
             raise AnalysisError(f"Failed to analyze flow {flow_id}: {e}")
     
     def analyze_test_case(self, test_case_id: int) -> List[AnomalyInfo]:
         """Analyze a specific test case. Returns list of anomalies."""
+        try:
+            with self.db_manager.transaction():
+                test_case = self.db_manager.get_test_case(test_case_id)
+                if not test_case:
+                    raise AnalysisError(f"Test case {test_case_id} not found.")
+                original_request = self.db_manager.get_request(test_case.request_id)
+                replayed_response_info = self.db_manager.get_replayed_response(test_case_id)
+                return self.db_manager.add_anomalies(self._detect_anomalies(
+                    test_case, original_request, replayed_response_info))
+        except AnalysisError:
+            raise
+        except Exception as e:
+            raise AnalysisError(f"Error analyzing test case {test_case_id}: {e}")
+    
+    def _detect_anomalies(self, test_case: TestCaseInfo,
+                          original_request: Optional[RequestInfo],
+                          replayed_response_info: Optional[ReplayedResponseInfo],
+                          original_content_lower: Optional[bytes] = None) -> List[Dict[str, Any]]:
+        """Detect anomalies for a loaded test case. Returns unsaved add_anomaly keyword arguments."""
+        test_case_id = test_case.test_case_id
         anomalies = []
         try:
-            test_case = self.db_manager.get_test_cases(request_id=None, flow_id=None)
-            test_case = next((tc for tc in test_case if tc.test_case_id == test_case_id), None)
-            if not test_case:
-                raise AnalysisError(f"Test case {test_case_id} not found.")
-            
-            original_request = self.db_manager.get_request(test_case.request_id)
             if not original_request:
                 raise AnalysisError(f"Original request for test case {test_case_id} not found.")
             
-            # Correctly fetch the replayed response associated with this test case
-            replayed_response_info = self.db_manager.get_replayed_response(test_case_id)
-            
             if not replayed_response_info:
                 # This means the replay module didn't record a response for this test case
                 # This itself could be an anomaly (e.g., request timed out, blocked)
                 anomaly_description = "No replayed response found for this test case. Possible timeout or block."
-                anomalies.append(self.db_manager.add_anomaly(
+                anomalies.append(dict(
                     test_case_id=test_case_id,
+                    flow_id=test_case.flow_id,
                     response_id=0, # No response ID, or a placeholder
                     type="no_response",
                     severity="High",
@@ -80,13 +114,12 @@ class ResponseAnalyzer:
                 vuln_type = None
                 
                 # Check for specific status code rules
-                for rule in self.status_code_rules:
-                    if (rule["original"] == original_request.response_status and
-                            rule["replayed"] == replayed_response_info.status_code):
-                        severity = rule["severity"]
-                        is_vuln = True
-                        vuln_type = rule["type"]
-                        break
+                rule = self._status_code_rule_index.get(
+                    (original_request.response_status, replayed_response_info.status_code))
+                if rule:
+                    severity = rule["severity"]
+                    is_vuln = True
+                    vuln_type = rule["type"]
                 
                 # Common cases
                 if replayed_response_info.status_code in [401, 403]:
@@ -100,8 +133,9 @@ class ResponseAnalyzer:
                     is_vuln = True
                     vuln_type = "error_disclosure"
 
-                anomalies.append(self.db_manager.add_anomaly(
+                anomalies.append(dict(
                     test_case_id=test_case_id,
+                    flow_id=test_case.flow_id,
                     response_id=replayed_response_info.response_id,
                     type="status_code_diff",
                     severity=severity,
@@ -121,8 +155,9 @@ class ResponseAnalyzer:
                 description = (
                     f"Content length changed significantly: {original_len} -> {replayed_len}."
                 )
-                anomalies.append(self.db_manager.add_anomaly(
+                anomalies.append(dict(
                     test_case_id=test_case_id,
+                    flow_id=test_case.flow_id,
                     response_id=replayed_response_info.response_id,
                     type="content_length_variation",
                     severity="Low",
@@ -133,36 +168,55 @@ class ResponseAnalyzer:
                 ))
             
             # 3. Keyword Detection in Replayed Response
-            replayed_content_str = replayed_response_info.content.decode(
-                errors='ignore').lower() if replayed_response_info.content else ""
+            # ASCII keywords are matched against the raw lowered bytes, which
+            # avoids decoding the body into a str of the same size
+            replayed_content = replayed_response_info.content
+            replayed_content_lower = replayed_content.lower() if replayed_content else b""
             
-            for rule in self.keyword_rules:
-                if rule["keyword"].lower() in replayed_content_str:
-                    keyword = rule["keyword"]
-                    description = f"Keyword '{keyword}' detected in replayed response."
-                    anomalies.append(self.db_manager.add_anomaly(
-                        test_case_id=test_case_id,
-                        response_id=replayed_response_info.response_id,
-                        type=rule["type"],
-                        severity=rule["severity"],
-                        description=description,
-                        confidence_score=0.9,
-                        is_potential_vulnerability=True,
-                        vulnerability_type=rule["type"]
-                    ))
+            # Each distinct keyword is searched once, however many rules share it
+            if replayed_content_lower:
+                replayed_text_lower = None
+                keyword_hits = {}
+                for rule in self.keyword_rules:
+                    keyword_lower = rule["keyword_lower"]
+                    if keyword_lower not in keyword_hits:
+                        keyword_bytes = rule["keyword_bytes"]
+                        if keyword_bytes is not None:
+                            keyword_hits[keyword_lower] = keyword_bytes in replayed_content_lower
+                        else:
+                            # Non-ASCII keywords need Unicode-aware lowercasing
+                            if replayed_text_lower is None:
+                                replayed_text_lower = replayed_content.decode(errors='ignore').lower()
+                            keyword_hits[keyword_lower] = keyword_lower in replayed_text_lower
+                    if keyword_hits[keyword_lower]:
+                        keyword = rule["keyword"]
+                        description = f"Keyword '{keyword}' detected in replayed response."
+                        anomalies.append(dict(
+                            test_case_id=test_case_id,
+                            flow_id=test_case.flow_id,
+                            response_id=replayed_response_info.response_id,
+                            type=rule["type"],
+                            severity=rule["severity"],
+                            description=description,
+                            confidence_score=0.9,
+                            is_potential_vulnerability=True,
+                            vulnerability_type=rule["type"]
+                        ))
             
             # 4. Generic Content Anomaly (simple diff for now)
             # More advanced content comparison (e.g., DOM diff, semantic diff) can be added later
-            original_content_str = original_request.response_content.decode(
-                errors='ignore').lower() if original_request.response_content else ""
+            original_content = original_request.response_content
+            if original_content_lower is None:
+                original_content_lower = original_content.lower() if original_content else b""
             
             # Check for unauthorized access based on content changes and test case category
             if test_case.category == "auth":
                 if original_request.response_status in [401, 403] and replayed_response_info.status_code == 200:
                     # This case is already handled by status code difference, but reinforce here
                     description = "Authentication bypass detected: Original request was unauthorized, but replayed request was successful."
-                    anomalies.append(self.db_manager.add_anomaly(
+                    anomalies.append(dict(
                         test_case_id=test_case_id,
+                        flow_id=test_case.flow_id,
                         response_id=replayed_response_info.response_id,
                         type="unauthorized_access",
                         severity="Critical",
@@ -171,10 +225,11 @@ class ResponseAnalyzer:
                         is_potential_vulnerability=True,
                         vulnerability_type="unauthorized_access"
                     ))
-                elif "success" in replayed_content_str and "success" not in original_content_str:
+                elif b"success" in replayed_content_lower and b"success" not in original_content_lower:
                     description = "Unexpected success message in replayed response for authentication test."
-                    anomalies.append(self.db_manager.add_anomaly(
+                    anomalies.append(dict(
                         test_case_id=test_case_id,
+                        flow_id=test_case.flow_id,
                         response_id=replayed_response_info.response_id,
                         type="unauthorized_access",
                         severity="High",
@@ -185,11 +240,13 @@ class ResponseAnalyzer:
                     ))
 
             # General content difference check (after specific auth checks)
-            if original_content_str and replayed_content_str and original_content_str != replayed_content_str:
-                if "error" in replayed_content_str and "error" not in original_content_str:
+            if (b"error" in replayed_content_lower and original_content
+                    and original_content != replayed_content):
+                if b"error" not in original_content_lower:
                     description = "New error message detected in replayed response."
-                    anomalies.append(self.db_manager.add_anomaly(
+                    anomalies.append(dict(
                         test_case_id=test_case_id,
+                        flow_id=test_case.flow_id,
                         response_id=replayed_response_info.response_id,
                         type="error_disclosure",
                         severity="Medium",
@@ -206,8 +263,8 @@ class ResponseAnalyzer:
     def set_detection_threshold(self, threshold: float) -> None:
         """Set confidence threshold for anomaly detection (0.0 to 1.0)."""
         if 0.0 <= threshold <= 1.0:
-            self.detection_threshold = threshold
-            self.db_manager.set_config("anomaly_detection_threshold", str(threshold))
+            self.db_manager.set_config("anomaly_detection_threshold", threshold)
+            self._detection_threshold = threshold
         else:
             raise ValueError("Threshold must be between 0.0 and 1.0")
     
@@ -220,7 +277,10 @@ class ResponseAnalyzer:
         
         # In a real scenario, these rules would be persisted in the DB
         rule_id = len(self.keyword_rules) + 1
-        self.keyword_rules.append({"id": rule_id, "keyword": keyword, "type": anomaly_type, "severity": severity})
+        keyword_lower = keyword.lower()
+        self.keyword_rules.append({"id": rule_id, "keyword": keyword, "keyword_lower": keyword_lower,
+                                   "keyword_bytes": keyword_lower.encode() if keyword_lower.isascii() else None,
+                                   "type": anomaly_type, "severity": severity})
         return rule_id
     
     def add_status_code_rule(self, original_status: int, replayed_status: int,
@@ -233,8 +293,11 @@ class ResponseAnalyzer:
         
         # In a real scenario, these rules would be persisted in the DB
         rule_id = len(self.status_code_rules) + 1
-        self.status_code_rules.append({"id": rule_id, "original": original_status, 
-                                       "replayed": replayed_status, "type": anomaly_type, "severity": severity})
+        rule = {"id": rule_id, "original": original_status,
+                "replayed": replayed_status, "type": anomaly_type, "severity": severity}
+        self.status_code_rules.append(rule)
+        # Earlier rules take precedence, as with the previous linear scan
+        self._status_code_rule_index.setdefault((original_status, replayed_status), rule)
         return rule_id
     
     def get_anomaly_types(self) -> List[str]:
@@ -10,6 +10,29 @@ from typing import Dict, Any, List, Optional
 from .database import DatabaseManager
 from .models import ConfigurationError
 
+# Prefer the LibYAML C bindings when PyYAML was built with them
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
+# Validation tables used by validate_config: (field, min, max) ranges and boolean fields
+_NUMERIC_FIELD_RANGES = (
+    ('max_concurrent_requests', 1, 100),
+    ('request_delay_ms', 0, 10000),
+    ('timeout_seconds', 1, 300),
+    ('max_payload_size', 1024, 10485760),  # 1KB to 10MB
+    ('anomaly_detection_threshold', 0.0, 1.0)
+)
+
+_BOOLEAN_FIELDS = (
+    'enable_numeric_payloads',
+    'enable_string_payloads',
+    'enable_auth_payloads',
+    'enable_parameter_payloads',
+    'enable_sequence_payloads'
+)
+
 
 class ConfigurationManager:
     """Manages configuration settings for the anomaly detector."""
@@ -19,6 +42,8 @@ class ConfigurationManager:
         self.db_manager = db_manager
         self.config_file = config_file
         self.config_cache = {}
+        self._dirty = set()  # Keys set in the cache but not yet written to the database
+        self._settings_cache = {}  # Coerced settings groups, rebuilt after any change
         self.load_config()
     
     def load_config(self) -> Dict[str, Any]:
@@ -27,18 +52,21 @@ class ConfigurationManager:
             # Load from database first
             db_config = self.db_manager.get_all_config()
             self.config_cache.update(db_config)
+            self._settings_cache.clear()
             
             # Load from file if it exists
             if os.path.exists(self.config_file):
                 with open(self.config_file, 'r', encoding='utf-8') as f:
-                    file_config = yaml.safe_load(f) or {}
+                    file_config = yaml.load(f, Loader=_YamlLoader) or {}
                 
                 # File config overrides database config
                 self.config_cache.update(file_config)
                 
-                # Sync file config back to database
-                for key, value in file_config.items():
-                    self.db_manager.set_config(key, str(value))
+                # Sync file config back to database, skipping unchanged values
+                self.db_manager.set_configs({
+                    key: value for key, value in file_config.items()
+                    if db_config.get(key) != value
+                })
             
             return self.config_cache
         except Exception as e:
@@ -49,14 +77,15 @@ class ConfigurationManager:
         try:
             # Update cache
             self.config_cache.update(config)
+            self._settings_cache.clear()
             
-            # Save to database
-            for key, value in config.items():
-                self.db_manager.set_config(key, str(value))
+            # Save to database, together with any pending keys
+            self._dirty.update(config)
+            self.flush()
             
             # Save to file
             with open(self.config_file, 'w', encoding='utf-8') as f:
-                yaml.dump(self.config_cache, f, default_flow_style=False)
+                yaml.dump(self.config_cache, f, Dumper=_YamlDumper, default_flow_style=False)
             
             return True
         except Exception as e:
@@ -66,15 +95,24 @@ class ConfigurationManager:
         """Get configuration value."""
         return self.config_cache.get(key, default)
     
-    def set(self, key: str, value: Any) -> bool:
-        """Set configuration value."""
+    def set(self, key: str, value: Any, flush: bool = True) -> bool:
+        """Set configuration value. With flush=False it is written on the next flush()."""
         try:
             self.config_cache[key] = value
-            self.db_manager.set_config(key, str(value))
+            self._settings_cache.clear()
+            self._dirty.add(key)
+            if flush:
+                self.flush()
             return True
         except Exception as e:
             raise ConfigurationError(f"Failed to set configuration {key}: {e}")
     
+    def flush(self) -> None:
+        """Write all pending configuration values to the database in one transaction."""
+        if self._dirty:
+            self.db_manager.set_configs({key: self.config_cache[key] for key in self._dirty})
+            self._dirty.clear()
+    
     def reset_to_defaults(self) -> bool:
         """Reset configuration to default values."""
         try:
@@ -101,15 +139,7 @@ class ConfigurationManager:
         errors = []
         
         # Validate numeric values
-        numeric_fields = {
-            'max_concurrent_requests': (1, 100),
-            'request_delay_ms': (0, 10000),
-            'timeout_seconds': (1, 300),
-            'max_payload_size': (1024, 10485760),  # 1KB to 10MB
-            'anomaly_detection_threshold': (0.0, 1.0)
-        }
-        
-        for field, (min_val, max_val) in numeric_fields.items():
+        for field, min_val, max_val in _NUMERIC_FIELD_RANGES:
             if field in config:
                 try:
                     value = float(config[field])
@@ -119,15 +149,7 @@ class ConfigurationManager:
                     errors.append(f"{field} must be a valid number")
         
         # Validate boolean values
-        boolean_fields = [
-            'enable_numeric_payloads',
-            'enable_string_payloads',
-            'enable_auth_payloads',
-            'enable_parameter_payloads',
-            'enable_sequence_payloads'
-        ]
-        
-        for field in boolean_fields:
+        for field in _BOOLEAN_FIELDS:
             if field in config:
                 value = config[field]
                 if not isinstance(value, bool) and str(value).lower() not in ['true', 'false']:
@@ -142,54 +164,66 @@ class ConfigurationManager:
     
     def get_payload_settings(self) -> Dict[str, bool]:
         """Get payload generation settings."""
-        return {
-            'numeric': self.get('enable_numeric_payloads', True),
-            'string': self.get('enable_string_payloads', True),
-            'auth': self.get('enable_auth_payloads', True),
-            'parameter': self.get('enable_parameter_payloads', True),
-            'sequence': self.get('enable_sequence_payloads', True)
-        }
+        settings = self._settings_cache.get('payload')
+        if settings is None:
+            settings = self._settings_cache['payload'] = {
+                'numeric': self.get('enable_numeric_payloads', True),
+                'string': self.get('enable_string_payloads', True),
+                'auth': self.get('enable_auth_payloads', True),
+                'parameter': self.get('enable_parameter_payloads', True),
+                'sequence': self.get('enable_sequence_payloads', True)
+            }
+        return dict(settings)
     
     def set_payload_settings(self, settings: Dict[str, bool]) -> bool:
         """Set payload generation settings."""
         try:
             for category, enabled in settings.items():
                 key = f'enable_{category}_payloads'
-                self.set(key, enabled)
+                self.set(key, enabled, flush=False)
+            self.flush()
             return True
         except Exception as e:
             raise ConfigurationError(f"Failed to set payload settings: {e}")
     
     def get_replay_settings(self) -> Dict[str, Any]:
         """Get replay settings."""
-        return {
-            'max_concurrent_requests': int(self.get('max_concurrent_requests', 10)),
-            'request_delay_ms': int(self.get('request_delay_ms', 100)),
-            'timeout_seconds': int(self.get('timeout_seconds', 30))
-        }
+        settings = self._settings_cache.get('replay')
+        if settings is None:
+            settings = self._settings_cache['replay'] = {
+                'max_concurrent_requests': int(self.get('max_concurrent_requests', 10)),
+                'request_delay_ms': int(self.get('request_delay_ms', 100)),
+                'timeout_seconds': int(self.get('timeout_seconds', 30))
+            }
+        return dict(settings)
     
     def set_replay_settings(self, settings: Dict[str, Any]) -> bool:
         """Set replay settings."""
         try:
             for key, value in settings.items():
                 if key in ['max_concurrent_requests', 'request_delay_ms', 'timeout_seconds']:
-                    self.set(key, value)
+                    self.set(key, value, flush=False)
+            self.flush()
             return True
         except Exception as e:
             raise ConfigurationError(f"Failed to set replay settings: {e}")
     
     def get_analysis_settings(self) -> Dict[str, Any]:
         """Get analysis settings."""
-        return {
-            'anomaly_detection_threshold': float(self.get('anomaly_detection_threshold', 0.7))
-        }
+        settings = self._settings_cache.get('analysis')
+        if settings is None:
+            settings = self._settings_cache['analysis'] = {
+                'anomaly_detection_threshold': float(self.get('anomaly_detection_threshold', 0.7))
+            }
+        return dict(settings)
     
     def set_analysis_settings(self, settings: Dict[str, Any]) -> bool:
         """Set analysis settings."""
         try:
             for key, value in settings.items():
                 if key in ['anomaly_detection_threshold']:
-                    self.set(key, value)
+                    self.set(key, value, flush=False)
+            self.flush()
             return True
         except Exception as e:
             raise ConfigurationError(f"Failed to set analysis settings: {e}")
@@ -5,16 +5,24 @@ Handles all database interactions using SQLAlchemy.
 
 import json
 import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple
 
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, LargeBinary, Boolean, Float
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event, inspect, make_url, func, insert, select, text, Column, Index, Integer, String, Text, DateTime, LargeBinary, Boolean, Float
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import sessionmaker, declarative_base, defer
 from sqlalchemy.exc import SQLAlchemyError
 
 from .models import (
     FlowInfo, RequestInfo, TestCaseInfo, ReplayedResponseInfo, AnomalyInfo, SessionInfo,
-    DatabaseError, serialize_headers, deserialize_headers
+    DatabaseError, serialize_headers, deserialize_headers,
+    serialize_session_data, deserialize_session_data,
+    serialize_config_value, deserialize_config_value
 )
 
 Base = declarative_base()
@@ -27,11 +35,13 @@ class Flow(Base):
     description = Column(Text)
     target_domain = Column(String)
     timestamp = Column(DateTime, default=datetime.now)
-    request_count = Column(Integer, default=0)
+    request_count = Column(Integer, default=0)  # Legacy; counts are computed from requests
 
 
 class Request(Base):
     __tablename__ = 'requests'
+    # Serves both the flow_id filter and the sequence ordering of get_requests
+    __table_args__ = (Index('ix_requests_flow_id_sequence_number', 'flow_id', 'sequence_number'),)
     request_id = Column(Integer, primary_key=True, autoincrement=True)
     flow_id = Column(Integer, nullable=False)
     sequence_number = Column(Integer, nullable=False)
@@ -49,8 +59,8 @@ class Request(Base):
 class TestCase(Base):
     __tablename__ = 'test_cases'
     test_case_id = Column(Integer, primary_key=True, autoincrement=True)
-    flow_id = Column(Integer, nullable=False)
-    request_id = Column(Integer, nullable=False)
+    flow_id = Column(Integer, nullable=False, index=True)
+    request_id = Column(Integer, nullable=False, index=True)
     type = Column(String, nullable=False)  # e.g., 'numeric_modification', 'string_modification'
     category = Column(String)  # e.g., 'auth', 'parameter_tampering'
     description = Column(Text)
@@ -64,7 +74,8 @@ class TestCase(Base):
 class ReplayedResponse(Base):
     __tablename__ = 'replayed_responses'
     response_id = Column(Integer, primary_key=True, autoincrement=True)
-    test_case_id = Column(Integer, nullable=False)
+    test_case_id = Column(Integer, nullable=False, index=True)
+    flow_id = Column(Integer, index=True)  # Copied from the test case for per-flow lookups
     status_code = Column(Integer)
     headers = Column(Text)  # Stored as JSON string
     content = Column(LargeBinary)
@@ -76,7 +87,8 @@ class ReplayedResponse(Base):
 class Anomaly(Base):
     __tablename__ = 'anomalies'
     anomaly_id = Column(Integer, primary_key=True, autoincrement=True)
-    test_case_id = Column(Integer, nullable=False)
+    test_case_id = Column(Integer, nullable=False, index=True)
+    flow_id = Column(Integer, index=True)  # Copied from the test case for per-flow lookups
     response_id = Column(Integer) # Can be null if no response (e.g., timeout)
     type = Column(String, nullable=False)  # e.g., 'status_code_diff', 'content_change'
     severity = Column(String, nullable=False) # e.g., 'Low', 'Medium', 'High', 'Critical'
@@ -118,17 +130,146 @@ class PayloadRule(Base):
     description = Column(Text)
 
 
+# Number of requests recorded for the enclosing Flow row, answered from the
+# (flow_id, sequence_number) index instead of a counter kept up to date on insert
+_flow_request_count = (
+    select(func.count(Request.request_id))
+    .where(Request.flow_id == Flow.flow_id)
+    .correlate(Flow)
+    .scalar_subquery()
+)
+
+
+# Stored HTTP bodies are zlib-compressed behind this prefix; rows written
+# before compression was introduced have no prefix and are returned as-is
+_COMPRESSED_BODY_PREFIX = b"\x00zlb"
+_COMPRESS_MIN_SIZE = 256
+
+
+def _pack_body(data: Optional[bytes]) -> Optional[bytes]:
+    """Compress a body for storage when that makes it smaller."""
+    if data and (len(data) >= _COMPRESS_MIN_SIZE or data.startswith(_COMPRESSED_BODY_PREFIX)):
+        packed = _COMPRESSED_BODY_PREFIX + zlib.compress(data)
+        # A raw body that happens to start with the prefix must always be packed
+        if len(packed) < len(data) or data.startswith(_COMPRESSED_BODY_PREFIX):
+            return packed
+    return data
+
+
+def _unpack_body(data: Optional[bytes]) -> Optional[bytes]:
+    """Return the original bytes of a body written by _pack_body."""
+    if data and data.startswith(_COMPRESSED_BODY_PREFIX):
+        return zlib.decompress(memoryview(data)[len(_COMPRESSED_BODY_PREFIX):])
+    return data
+
+
+# Layout SQLAlchemy's SQLite DateTime type reads and writes
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+# Applied to every new SQLite connection: WAL with synchronous=NORMAL avoids an
+# fsync per commit, the rest keep more of the database in memory
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+# Pool for file-backed SQLite databases, sized so concurrent replay workers
+# (max_concurrent_requests) reuse open, pragma-tuned connections instead of
+# waiting on the default five; in-memory databases keep SQLAlchemy's pool
+SQLITE_POOL_OPTIONS = {
+    "pool_size": 16,
+    "max_overflow": 32,
+    "connect_args": {"check_same_thread": False, "timeout": 5.0},
+}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune a freshly opened SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
 class DatabaseManager:
     """Manages database connections and operations."""
 
-    def __init__(self, db_url: str = "sqlite:///./anomaly_detector.db"):
-        """Initialize database connection and create tables."""
-        self.engine = create_engine(db_url)
+    def __init__(self, db_url: str = "sqlite:///./anomaly_detector.db", **engine_options):
+        """Initialize database connection and create tables. engine_options go to create_engine."""
+        url = make_url(db_url)
+        if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+            engine_options = {**SQLITE_POOL_OPTIONS, **engine_options}
+        self.engine = create_engine(url, **engine_options)
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", _apply_sqlite_pragmas)
         Base.metadata.create_all(self.engine)
+        self._add_flow_id_columns()
+        # create_all skips the indexes of tables that already exist, so add
+        # any that are missing from databases created before they were declared
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(self.engine, checkfirst=True)
         self.Session = sessionmaker(bind=self.engine)
+        # Session of the transaction() block open on the current thread, if any
+        self._local = threading.local()
+        # Configuration table contents, loaded on first read and kept in step by set_configs
+        self._config_cache = None
+
+    def _add_flow_id_columns(self) -> None:
+        """Add and backfill the denormalized flow_id column on databases created without it."""
+        inspector = inspect(self.engine)
+        with self.engine.begin() as connection:
+            for table in (ReplayedResponse.__table__, Anomaly.__table__):
+                if 'flow_id' in {column['name'] for column in inspector.get_columns(table.name)}:
+                    continue
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN flow_id INTEGER"))
+                connection.execute(text(
+                    f"UPDATE {table.name} SET flow_id = (SELECT test_cases.flow_id FROM test_cases "
+                    f"WHERE test_cases.test_case_id = {table.name}.test_case_id)"
+                ))
+
+    @contextmanager
+    def transaction(self):
+        """Run every DatabaseManager call in the block in one session and transaction."""
+        session = getattr(self._local, 'session', None)
+        if session is not None:
+            # Nested blocks join the outermost transaction
+            yield session
+            return
+        session = self.Session()
+        self._local.session = session
+        try:
+            yield session
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            self._config_cache = None  # May hold values written in the block
+            raise DatabaseError(f"Database operation failed: {e}") from e
+        except Exception:
+            session.rollback()
+            self._config_cache = None
+            raise
+        finally:
+            self._local.session = None
+            session.close()
 
     def _execute_query(self, query_func, *args, **kwargs):
         """Helper to execute database queries with session management."""
+        session = getattr(self._local, 'session', None)
+        if session is not None:
+            # Inside transaction(): the block commits or rolls back
+            try:
+                return query_func(session, *args, **kwargs)
+            except SQLAlchemyError as e:
+                raise DatabaseError(f"Database operation failed: {e}") from e
         session = self.Session()
         try:
             result = query_func(session, *args, **kwargs)
@@ -140,28 +281,69 @@ class DatabaseManager:
         finally:
             session.close()
 
+    def _insert_rows(self, session, model, primary_key, rows: List[Dict[str, Any]]) -> List[int]:
+        """Insert uniformly keyed rows in the session's transaction and return their IDs in order."""
+        if self.engine.dialect.name != "sqlite":
+            return session.scalars(
+                insert(model).returning(primary_key, sort_by_parameter_order=True), rows
+            ).all()
+        # On SQLite the batch goes straight to the sqlite3 cursor, skipping
+        # SQLAlchemy's per-row parameter processing. The writer holds the
+        # database lock for the whole executemany, so the rowids it assigns are
+        # consecutive and end at last_insert_rowid().
+        table = model.__table__
+        columns = list(rows[0])
+        # DateTime columns missing from the rows get their datetime.now default
+        defaulted = [column.name for column in table.columns
+                     if isinstance(column.type, DateTime) and column.name not in rows[0]]
+        now = datetime.now().strftime(SQLITE_DATETIME_FORMAT)
+        sql = (f"INSERT INTO {table.name} ({', '.join(columns + defaulted)}) "
+               f"VALUES ({', '.join('?' * (len(columns) + len(defaulted)))})")
+        params = [tuple(row[column] for column in columns) + (now,) * len(defaulted) for row in rows]
+        cursor = session.connection().connection.cursor()
+        try:
+            cursor.executemany(sql, params)
+            cursor.execute("SELECT last_insert_rowid()")
+            last_id = cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Database operation failed: {e}") from e
+        finally:
+            cursor.close()
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+
+    def _fill_flow_ids(self, session, rows: List[Dict[str, Any]]) -> None:
+        """Look up the flow_id of rows whose caller did not supply it."""
+        missing = {row['test_case_id'] for row in rows if row['flow_id'] is None}
+        if missing:
+            flow_ids = dict(session.execute(
+                select(TestCase.test_case_id, TestCase.flow_id).where(TestCase.test_case_id.in_(missing))
+            ).all())
+            for row in rows:
+                if row['flow_id'] is None:
+                    row['flow_id'] = flow_ids.get(row['test_case_id'])
+
     def create_flow(self, name: str, description: Optional[str] = None,
                     target_domain: Optional[str] = None) -> int:
         """Create a new flow and return its ID."""
         def _query(session):
-            new_flow = Flow(name=name, description=description, target_domain=target_domain)
-            session.add(new_flow)
-            session.flush()  # To get the flow_id before commit
-            return new_flow.flow_id
+            return session.execute(insert(Flow).values(
+                name=name, description=description, target_domain=target_domain
+            ).returning(Flow.flow_id)).scalar_one()
         return self._execute_query(_query)
 
     def get_flow(self, flow_id: int) -> Optional[FlowInfo]:
         """Retrieve flow information by ID."""
         def _query(session):
-            flow = session.query(Flow).filter_by(flow_id=flow_id).first()
-            if flow:
+            row = session.query(Flow, _flow_request_count).filter(Flow.flow_id == flow_id).first()
+            if row:
+                flow, request_count = row
                 return FlowInfo(
                     flow_id=flow.flow_id,
                     name=flow.name,
                     description=flow.description,
                     target_domain=flow.target_domain,
                     timestamp=flow.timestamp,
-                    request_count=flow.request_count
+                    request_count=request_count
                 )
             return None
         return self._execute_query(_query)
@@ -169,15 +351,15 @@ class DatabaseManager:
     def get_all_flows(self) -> List[FlowInfo]:
         """Retrieve all flows."""
         def _query(session):
-            flows = session.query(Flow).all()
+            rows = session.query(Flow, _flow_request_count).all()
             return [FlowInfo(
                 flow_id=flow.flow_id,
                 name=flow.name,
                 description=flow.description,
                 target_domain=flow.target_domain,
                 timestamp=flow.timestamp,
-                request_count=flow.request_count
-            ) for flow in flows]
+                request_count=request_count
+            ) for flow, request_count in rows]
         return self._execute_query(_query)
 
     def add_request(self, flow_id: int, sequence_number: int, url: str, method: str,
@@ -185,25 +367,36 @@ class DatabaseManager:
                     response_status: int, response_headers: Dict[str, str],
                     response_content: Optional[bytes]) -> int:
         """Add a new request to a flow and return its ID."""
+        return self.add_requests([dict(
+            flow_id=flow_id,
+            sequence_number=sequence_number,
+            url=url,
+            method=method,
+            headers=headers,
+            body=body,
+            response_status=response_status,
+            response_headers=response_headers,
+            response_content=response_content
+        )])[0]
+
+    def add_requests(self, requests: List[Dict[str, Any]]) -> List[int]:
+        """Add several requests (add_request keyword dicts) in one transaction."""
+        if not requests:
+            return []
+        rows = [dict(
+            flow_id=request['flow_id'],
+            sequence_number=request['sequence_number'],
+            url=request['url'],
+            method=request['method'],
+            headers=serialize_headers(request['headers']),
+            body=_pack_body(request['body']),
+            response_status=request['response_status'],
+            response_headers=serialize_headers(request['response_headers']),
+            response_content=_pack_body(request['response_content']),
+            response_content_length=len(request['response_content']) if request['response_content'] else 0
+        ) for request in requests]
         def _query(session):
-            new_request = Request(
-                flow_id=flow_id,
-                sequence_number=sequence_number,
-                url=url,
-                method=method,
-                headers=serialize_headers(headers),
-                body=body,
-                response_status=response_status,
-                response_headers=serialize_headers(response_headers),
-                response_content=response_content,
-                response_content_length=len(response_content) if response_content else 0
-            )
-            session.add(new_request)
-            session.query(Flow).filter_by(flow_id=flow_id).update({
-                Flow.request_count: Flow.request_count + 1
-            })
-            session.flush()
-            return new_request.request_id
+            return self._insert_rows(session, Request, Request.request_id, rows)
         return self._execute_query(_query)
 
     def get_request(self, request_id: int) -> Optional[RequestInfo]:
@@ -218,20 +411,23 @@ class DatabaseManager:
                     url=request.url,
                     method=request.method,
                     headers=deserialize_headers(request.headers),
-                    body=request.body,
+                    body=_unpack_body(request.body),
                     response_status=request.response_status,
                     response_headers=deserialize_headers(request.response_headers),
-                    response_content=request.response_content,
+                    response_content=_unpack_body(request.response_content),
                     response_content_length=request.response_content_length,
                     timestamp=request.timestamp
                 )
             return None
         return self._execute_query(_query)
 
-    def get_requests(self, flow_id: int) -> List[RequestInfo]:
-        """Retrieve all requests for a given flow."""
+    def get_requests(self, flow_id: int, include_body: bool = True) -> List[RequestInfo]:
+        """Retrieve all requests for a given flow. Without include_body the blobs are not loaded."""
         def _query(session):
-            requests = session.query(Request).filter_by(flow_id=flow_id).order_by(Request.sequence_number).all()
+            query = session.query(Request).filter_by(flow_id=flow_id)
+            if not include_body:
+                query = query.options(defer(Request.body), defer(Request.response_content))
+            requests = query.order_by(Request.sequence_number).all()
             return [RequestInfo(
                 request_id=req.request_id,
                 flow_id=req.flow_id,
@@ -239,43 +435,93 @@ class DatabaseManager:
                 url=req.url,
                 method=req.method,
                 headers=deserialize_headers(req.headers),
-                body=req.body,
+                body=_unpack_body(req.body) if include_body else None,
                 response_status=req.response_status,
                 response_headers=deserialize_headers(req.response_headers),
-                response_content=req.response_content,
+                response_content=_unpack_body(req.response_content) if include_body else None,
                 response_content_length=req.response_content_length,
                 timestamp=req.timestamp
             ) for req in requests]
         return self._execute_query(_query)
 
+    def get_request_rows(self, flow_id: int) -> List[Row]:
+        """Retrieve request metadata rows for a flow, with headers left as JSON strings."""
+        def _query(session):
+            return session.execute(select(
+                Request.request_id, Request.flow_id, Request.sequence_number, Request.url,
+                Request.method, Request.headers, Request.response_status,
+                Request.response_headers, Request.response_content_length, Request.timestamp
+            ).where(Request.flow_id == flow_id).order_by(Request.sequence_number)).all()
+        return self._execute_query(_query)
+
     def add_test_case(self, flow_id: int, request_id: int, type: str, category: str,
                       description: str, payload_value: str,
                       modified_url: Optional[str] = None,
                       modified_headers: Optional[Dict[str, str]] = None,
                       modified_body: Optional[bytes] = None) -> int:
         """Add a new test case and return its ID."""
+        return self.add_test_cases([dict(
+            flow_id=flow_id,
+            request_id=request_id,
+            type=type,
+            category=category,
+            description=description,
+            payload_value=payload_value,
+            modified_url=modified_url,
+            modified_headers=modified_headers,
+            modified_body=modified_body
+        )])[0]
+
+    def add_test_cases(self, test_cases: List[Dict[str, Any]]) -> List[int]:
+        """Add several test cases (add_test_case keyword dicts) in one transaction."""
+        if not test_cases:
+            return []
+        # Every row carries the same keys so the insert runs as a single executemany
+        rows = [dict(
+            flow_id=test_case['flow_id'],
+            request_id=test_case['request_id'],
+            type=test_case['type'],
+            category=test_case['category'],
+            description=test_case['description'],
+            payload_value=test_case['payload_value'],
+            modified_url=test_case.get('modified_url'),
+            modified_headers=(serialize_headers(test_case['modified_headers'])
+                              if test_case.get('modified_headers') else None),
+            modified_body=_pack_body(test_case.get('modified_body'))
+        ) for test_case in test_cases]
         def _query(session):
-            new_test_case = TestCase(
-                flow_id=flow_id,
-                request_id=request_id,
-                type=type,
-                category=category,
-                description=description,
-                payload_value=payload_value,
-                modified_url=modified_url,
-                modified_headers=serialize_headers(modified_headers) if modified_headers else None,
-                modified_body=modified_body
-            )
-            session.add(new_test_case)
-            session.flush()
-            return new_test_case.test_case_id
+            return self._insert_rows(session, TestCase, TestCase.test_case_id, rows)
+        return self._execute_query(_query)
+
+    def get_test_case(self, test_case_id: int) -> Optional[TestCaseInfo]:
+        """Retrieve test case information by ID."""
+        def _query(session):
+            tc = session.query(TestCase).filter_by(test_case_id=test_case_id).first()
+            if tc:
+                return TestCaseInfo(
+                    test_case_id=tc.test_case_id,
+                    flow_id=tc.flow_id,
+                    request_id=tc.request_id,
+                    type=tc.type,
+                    category=tc.category,
+                    description=tc.description,
+                    payload_value=tc.payload_value,
+                    modified_url=tc.modified_url,
+                    modified_headers=deserialize_headers(tc.modified_headers) if tc.modified_headers else None,
+                    modified_body=_unpack_body(tc.modified_body),
+                    timestamp=tc.timestamp
+                )
+            return None
         return self._execute_query(_query)
 
     def get_test_cases(self, flow_id: Optional[int] = None,
-                       request_id: Optional[int] = None) -> List[TestCaseInfo]:
-        """Retrieve test cases by flow ID or request ID."""
+                       request_id: Optional[int] = None,
+                       include_body: bool = True) -> List[TestCaseInfo]:
+        """Retrieve test cases by flow ID or request ID. Without include_body modified_body is not loaded."""
         def _query(session):
             query = session.query(TestCase)
+            if not include_body:
+                query = query.options(defer(TestCase.modified_body))
             if flow_id is not None:
                 query = query.filter_by(flow_id=flow_id)
             if request_id is not None:
@@ -291,27 +537,79 @@ class DatabaseManager:
                 payload_value=tc.payload_value,
                 modified_url=tc.modified_url,
                 modified_headers=deserialize_headers(tc.modified_headers) if tc.modified_headers else None,
-                modified_body=tc.modified_body,
+                modified_body=_unpack_body(tc.modified_body) if include_body else None,
                 timestamp=tc.timestamp
             ) for tc in test_cases]
         return self._execute_query(_query)
 
+    def get_test_cases_by_ids(self, test_case_ids: List[int]) -> List[TestCaseInfo]:
+        """Retrieve test cases by ID in one query, in the order given; unknown IDs are skipped."""
+        if not test_case_ids:
+            return []
+        def _query(session):
+            test_cases = {tc.test_case_id: tc for tc in session.query(TestCase).filter(
+                TestCase.test_case_id.in_(set(test_case_ids))
+            )}
+            return [TestCaseInfo(
+                test_case_id=tc.test_case_id,
+                flow_id=tc.flow_id,
+                request_id=tc.request_id,
+                type=tc.type,
+                category=tc.category,
+                description=tc.description,
+                payload_value=tc.payload_value,
+                modified_url=tc.modified_url,
+                modified_headers=deserialize_headers(tc.modified_headers) if tc.modified_headers else None,
+                modified_body=_unpack_body(tc.modified_body),
+                timestamp=tc.timestamp
+            ) for tc in map(test_cases.get, test_case_ids) if tc is not None]
+        return self._execute_query(_query)
+
+    def get_test_case_rows(self, flow_id: Optional[int] = None,
+                           request_id: Optional[int] = None) -> List[Row]:
+        """Retrieve test case metadata rows, with modified_headers left as a JSON string."""
+        def _query(session):
+            query = select(
+                TestCase.test_case_id, TestCase.flow_id, TestCase.request_id, TestCase.type,
+                TestCase.category, TestCase.description, TestCase.payload_value,
+                TestCase.modified_url, TestCase.modified_headers, TestCase.timestamp
+            )
+            if flow_id is not None:
+                query = query.where(TestCase.flow_id == flow_id)
+            if request_id is not None:
+                query = query.where(TestCase.request_id == request_id)
+            return session.execute(query).all()
+        return self._execute_query(_query)
+
     def add_replayed_response(self, test_case_id: int, status_code: int,
                               headers: Dict[str, str], content: bytes,
-                              response_time_ms: int) -> int:
+                              response_time_ms: int, flow_id: Optional[int] = None) -> int:
         """Add a replayed response and return its ID."""
+        return self.add_replayed_responses([dict(
+            test_case_id=test_case_id,
+            status_code=status_code,
+            headers=headers,
+            content=content,
+            response_time_ms=response_time_ms,
+            flow_id=flow_id
+        )])[0]
+
+    def add_replayed_responses(self, responses: List[Dict[str, Any]]) -> List[int]:
+        """Add several replayed responses (add_replayed_response keyword dicts) in one transaction."""
+        if not responses:
+            return []
+        rows = [dict(
+            test_case_id=response['test_case_id'],
+            status_code=response['status_code'],
+            headers=serialize_headers(response['headers']),
+            content=_pack_body(response['content']),
+            content_length=len(response['content']),
+            response_time_ms=response['response_time_ms'],
+            flow_id=response.get('flow_id')
+        ) for response in responses]
         def _query(session):
-            new_response = ReplayedResponse(
-                test_case_id=test_case_id,
-                status_code=status_code,
-                headers=serialize_headers(headers),
-                content=content,
-                content_length=len(content),
-                response_time_ms=response_time_ms
-            )
-            session.add(new_response)
-            session.flush()
-            return new_response.response_id
+            self._fill_flow_ids(session, rows)
+            return self._insert_rows(session, ReplayedResponse, ReplayedResponse.response_id, rows)
         return self._execute_query(_query)
 
     def get_replayed_response(self, test_case_id: int) -> Optional[ReplayedResponseInfo]:
@@ -324,7 +622,7 @@ class DatabaseManager:
                     test_case_id=response.test_case_id,
                     status_code=response.status_code,
                     headers=deserialize_headers(response.headers),
-                    content=response.content,
+                    content=_unpack_body(response.content),
                     content_length=response.content_length,
                     response_time_ms=response.response_time_ms,
                     timestamp=response.timestamp
@@ -332,6 +630,26 @@ class DatabaseManager:
             return None
         return self._execute_query(_query)
 
+    def get_replayed_responses(self, flow_id: int) -> Dict[int, ReplayedResponseInfo]:
+        """Retrieve the replayed responses of a flow, keyed by test case ID."""
+        def _query(session):
+            responses = session.query(ReplayedResponse).filter(
+                ReplayedResponse.flow_id == flow_id
+            ).order_by(ReplayedResponse.response_id.desc()).all()
+            # Iterating newest first leaves the oldest response per test case,
+            # matching get_replayed_response
+            return {response.test_case_id: ReplayedResponseInfo(
+                response_id=response.response_id,
+                test_case_id=response.test_case_id,
+                status_code=response.status_code,
+                headers=deserialize_headers(response.headers),
+                content=_unpack_body(response.content),
+                content_length=response.content_length,
+                response_time_ms=response.response_time_ms,
+                timestamp=response.timestamp
+            ) for response in responses}
+        return self._execute_query(_query)
+
     def add_anomaly(self, test_case_id: int, response_id: Optional[int], type: str,
                     severity: str, description: str, confidence_score: float,
                     is_potential_vulnerability: bool = False,
@@ -339,26 +657,48 @@ class DatabaseManager:
                     original_status: Optional[int] = None,
                     replayed_status: Optional[int] = None,
                     original_content_length: Optional[int] = None,
-                    replayed_content_length: Optional[int] = None) -> int:
+                    replayed_content_length: Optional[int] = None,
+                    flow_id: Optional[int] = None) -> int:
         """Add a new anomaly and return its ID."""
+        return self.add_anomalies([dict(
+            test_case_id=test_case_id,
+            response_id=response_id,
+            type=type,
+            severity=severity,
+            description=description,
+            confidence_score=confidence_score,
+            is_potential_vulnerability=is_potential_vulnerability,
+            vulnerability_type=vulnerability_type,
+            original_status=original_status,
+            replayed_status=replayed_status,
+            original_content_length=original_content_length,
+            replayed_content_length=replayed_content_length,
+            flow_id=flow_id
+        )])[0]
+
+    def add_anomalies(self, anomalies: List[Dict[str, Any]]) -> List[int]:
+        """Add several anomalies (add_anomaly keyword dicts) in one transaction."""
+        if not anomalies:
+            return []
+        # Every row carries the same keys so the insert runs as a single executemany
+        rows = [dict(
+            test_case_id=anomaly['test_case_id'],
+            response_id=anomaly['response_id'],
+            type=anomaly['type'],
+            severity=anomaly['severity'],
+            description=anomaly['description'],
+            confidence_score=anomaly['confidence_score'],
+            is_potential_vulnerability=anomaly.get('is_potential_vulnerability', False),
+            vulnerability_type=anomaly.get('vulnerability_type'),
+            original_status=anomaly.get('original_status'),
+            replayed_status=anomaly.get('replayed_status'),
+            original_content_length=anomaly.get('original_content_length'),
+            replayed_content_length=anomaly.get('replayed_content_length'),
+            flow_id=anomaly.get('flow_id')
+        ) for anomaly in anomalies]
         def _query(session):
-            new_anomaly = Anomaly(
-                test_case_id=test_case_id,
-                response_id=response_id,
-                type=type,
-                severity=severity,
-                description=description,
-                confidence_score=confidence_score,
-                is_potential_vulnerability=is_potential_vulnerability,
-                vulnerability_type=vulnerability_type,
-                original_status=original_status,
-                replayed_status=replayed_status,
-                original_content_length=original_content_length,
-                replayed_content_length=replayed_content_length
-            )
-            session.add(new_anomaly)
-            session.flush()
-            return new_anomaly.anomaly_id
+            self._fill_flow_ids(session, rows)
+            return self._insert_rows(session, Anomaly, Anomaly.anomaly_id, rows)
         return self._execute_query(_query)
 
     def get_anomalies(self, flow_id: Optional[int] = None,
@@ -367,8 +707,7 @@ class DatabaseManager:
         def _query(session):
             query = session.query(Anomaly)
             if flow_id is not None:
-                # Explicitly join with TestCase and filter
-                query = query.join(TestCase, Anomaly.test_case_id == TestCase.test_case_id).filter(TestCase.flow_id == flow_id)
+                query = query.filter(Anomaly.flow_id == flow_id)
             if test_case_id is not None:
                 query = query.filter_by(test_case_id=test_case_id)
             anomalies = query.all()
@@ -390,45 +729,64 @@ class DatabaseManager:
             ) for a in anomalies]
         return self._execute_query(_query)
 
-    def set_config(self, key: str, value: str) -> None:
+    def set_config(self, key: str, value: Any) -> None:
         """Set a configuration key-value pair."""
+        self.set_configs({key: value})
+
+    def set_configs(self, values: Dict[str, Any]) -> None:
+        """Set several configuration key-value pairs with a single upsert. Values are stored as JSON."""
+        if not values:
+            return
+        rows = [{"key": key, "value": serialize_config_value(value)} for key, value in values.items()]
+        # ON CONFLICT upserts are dialect-specific constructs
+        upsert = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}.get(self.engine.dialect.name)
         def _query(session):
-            config = session.query(Configuration).filter_by(key=key).first()
-            if config:
-                config.value = value
-            else:
-                new_config = Configuration(key=key, value=value)
-                session.add(new_config)
+            if upsert is not None:
+                stmt = upsert(Configuration).values(rows)
+                session.execute(stmt.on_conflict_do_update(
+                    index_elements=[Configuration.key], set_={"value": stmt.excluded.value}))
+                return
+            # Other engines update the keys that exist and add the rest
+            existing = {config.key: config for config in
+                        session.query(Configuration).filter(Configuration.key.in_(list(values)))}
+            for row in rows:
+                config = existing.get(row["key"])
+                if config:
+                    config.value = row["value"]
+                else:
+                    session.add(Configuration(**row))
         self._execute_query(_query)
-
-    def get_config(self, key: str) -> Optional[str]:
+        if self._config_cache is not None:
+            self._config_cache.update(values)
+
+    def _load_config(self) -> Dict[str, Any]:
+        """Return the cached, decoded configuration table, reading it on first use."""
+        if self._config_cache is None:
+            def _query(session):
+                configs = session.query(Configuration).all()
+                return {c.key: deserialize_config_value(c.value) for c in configs}
+            self._config_cache = self._execute_query(_query)
+        return self._config_cache
+
+    def get_config(self, key: str) -> Any:
         """Get a configuration value by key."""
-        def _query(session):
-            config = session.query(Configuration).filter_by(key=key).first()
-            return config.value if config else None
-        return self._execute_query(_query)
+        return self._load_config().get(key)
 
-    def get_all_config(self) -> Dict[str, str]:
+    def get_all_config(self) -> Dict[str, Any]:
         """Get all configuration key-value pairs."""
-        def _query(session):
-            configs = session.query(Configuration).all()
-            return {c.key: c.value for c in configs}
-        return self._execute_query(_query)
+        return dict(self._load_config())
 
     def create_session(self, flow_id: int, session_name: str,
                        cookies: Optional[Dict[str, str]] = None,
                        auth_headers: Optional[Dict[str, str]] = None) -> int:
         """Create a new session and return its ID."""
         def _query(session):
-            new_session = Session(
+            return session.execute(insert(Session).values(
                 flow_id=flow_id,
                 session_name=session_name,
-                cookies=json.dumps(cookies) if cookies else None,
-                auth_headers=json.dumps(auth_headers) if auth_headers else None
-            )
-            session.add(new_session)
-            session.flush()
-            return new_session.session_id
+                cookies=serialize_session_data(cookies) if cookies else None,
+                auth_headers=serialize_session_data(auth_headers) if auth_headers else None
+            ).returning(Session.session_id)).scalar_one()
         return self._execute_query(_query)
 
     def get_session(self, flow_id: int) -> Optional[SessionInfo]:
@@ -440,8 +798,8 @@ class DatabaseManager:
                     session_id=session_obj.session_id,
                     flow_id=session_obj.flow_id,
                     session_name=session_obj.session_name,
-                    cookies=json.loads(session_obj.cookies) if session_obj.cookies else None,
-                    auth_headers=json.loads(session_obj.auth_headers) if session_obj.auth_headers else None,
+                    cookies=deserialize_session_data(session_obj.cookies) if session_obj.cookies else None,
+                    auth_headers=deserialize_session_data(session_obj.auth_headers) if session_obj.auth_headers else None,
                     created_timestamp=session_obj.created_timestamp,
                     last_updated_timestamp=session_obj.last_updated_timestamp
                 )
@@ -456,9 +814,9 @@ class DatabaseManager:
             session_obj = session.query(Session).filter_by(session_id=session_id).first()
             if session_obj:
                 if cookies is not None:
-                    session_obj.cookies = json.dumps(cookies)
+                    session_obj.cookies = serialize_session_data(cookies)
                 if auth_headers is not None:
-                    session_obj.auth_headers = json.dumps(auth_headers)
+                    session_obj.auth_headers = serialize_session_data(auth_headers)
                 return True
             return False
         return self._execute_query(_query)
@@ -466,16 +824,13 @@ class DatabaseManager:
     def add_payload_rule(self, category: str, type: str, rule_data: Dict[str, Any], enabled: bool = True, description: Optional[str] = None) -> int:
         """Add a new payload generation rule."""
         def _query(session):
-            new_rule = PayloadRule(
+            return session.execute(insert(PayloadRule).values(
                 category=category,
                 type=type,
                 rule_data=json.dumps(rule_data),
                 enabled=enabled,
                 description=description
-            )
-            session.add(new_rule)
-            session.flush()
-            return new_rule.rule_id
+            ).returning(PayloadRule.rule_id)).scalar_one()
         return self._execute_query(_query)
 
     def get_payload_rules(self, category: Optional[str] = None, enabled_only: bool = False) -> List[Dict[str, Any]]:
@@ -2,14 +2,48 @@
 Enhanced reporting module with advanced analytics and risk scoring.
 """
 
-import json
+from bisect import bisect_left
+from collections import Counter
 from datetime import datetime
 from typing import Dict, List, Any, Optional
-from dataclasses import asdict
-from jinja2 import Environment, FileSystemLoader
+from dataclasses import fields
+from functools import lru_cache
+from operator import attrgetter
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+import orjson
 import os
 
-from src.models import FlowInfo, AnomalyInfo
+from src.models import FlowInfo, AnomalyInfo, sort_anomalies_by_severity
+
+
+# Field names and C-level getters for shallow dict conversion. The DTO fields
+# are all scalars, so this matches asdict() without its recursive deepcopy.
+_FLOW_FIELDS = tuple(field.name for field in fields(FlowInfo))
+_get_flow_fields = attrgetter(*_FLOW_FIELDS)
+_ANOMALY_FIELDS = tuple(field.name for field in fields(AnomalyInfo))
+_get_anomaly_fields = attrgetter(*_ANOMALY_FIELDS)
+
+
+@lru_cache(maxsize=None)
+def _get_environment(template_dir: str) -> Environment:
+    """Shared Jinja environment per template directory, with compiled templates cached on disk."""
+    # Templates ship with the application, so skip the per-render freshness check
+    return Environment(
+        loader=FileSystemLoader(template_dir),
+        auto_reload=False,
+        bytecode_cache=FileSystemBytecodeCache(),
+        cache_size=400
+    )
+
+
+def _flow_to_dict(flow: FlowInfo) -> Dict[str, Any]:
+    """Convert a flow to a plain dict."""
+    return dict(zip(_FLOW_FIELDS, _get_flow_fields(flow)))
+
+
+def _anomaly_to_dict(anomaly: AnomalyInfo) -> Dict[str, Any]:
+    """Convert an anomaly to a plain dict."""
+    return dict(zip(_ANOMALY_FIELDS, _get_anomaly_fields(anomaly)))
 
 
 class RiskScorer:
@@ -28,11 +62,17 @@ class RiskScorer:
     @classmethod
     def calculate_anomaly_risk(cls, anomaly: AnomalyInfo) -> float:
         """Calculate risk score for a single anomaly."""
-        base_score = cls.SEVERITY_WEIGHTS.get(anomaly.severity, 1.0)
-        confidence_factor = anomaly.confidence_score
-        vulnerability_factor = cls.VULNERABILITY_MULTIPLIER if anomaly.is_potential_vulnerability else 1.0
+        return cls._anomaly_risk(anomaly.severity, anomaly.confidence_score,
+                                 anomaly.is_potential_vulnerability)
+    
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def _anomaly_risk(cls, severity: str, confidence_score: float, is_potential_vulnerability: bool) -> float:
+        """Risk score for one combination of inputs; few distinct combinations occur, so it is memoized."""
+        base_score = cls.SEVERITY_WEIGHTS.get(severity, 1.0)
+        vulnerability_factor = cls.VULNERABILITY_MULTIPLIER if is_potential_vulnerability else 1.0
         
-        return min(10.0, base_score * confidence_factor * vulnerability_factor)
+        return min(10.0, base_score * confidence_score * vulnerability_factor)
     
     @classmethod
     def calculate_flow_risk(cls, anomalies: List[AnomalyInfo]) -> float:
@@ -60,11 +100,12 @@ class TrendAnalyzer:
     @staticmethod
     def analyze_severity_trends(anomalies: List[AnomalyInfo]) -> Dict[str, Any]:
         """Analyze severity distribution trends."""
-        severity_counts = {}
-        for anomaly in anomalies:
-            severity_counts[anomaly.severity] = severity_counts.get(anomaly.severity, 0) + 1
-        
-        total = len(anomalies)
+        severity_counts = Counter(anomaly.severity for anomaly in anomalies)
+        return TrendAnalyzer._severity_trends(severity_counts, len(anomalies))
+    
+    @staticmethod
+    def _severity_trends(severity_counts: Dict[str, int], total: int) -> Dict[str, Any]:
+        """Build the severity trend result from precomputed counts."""
         severity_percentages = {
             severity: (count / total * 100) if total > 0 else 0
             for severity, count in severity_counts.items()
@@ -79,12 +120,14 @@ class TrendAnalyzer:
     @staticmethod
     def analyze_type_trends(anomalies: List[AnomalyInfo]) -> Dict[str, Any]:
         """Analyze anomaly type distribution."""
-        type_counts = {}
-        for anomaly in anomalies:
-            type_counts[anomaly.type] = type_counts.get(anomaly.type, 0) + 1
-        
+        type_counts = Counter(anomaly.type for anomaly in anomalies)
+        return TrendAnalyzer._type_trends(type_counts)
+    
+    @staticmethod
+    def _type_trends(type_counts: Counter) -> Dict[str, Any]:
+        """Build the type trend result from precomputed counts."""
         # Sort by frequency
-        sorted_types = sorted(type_counts.items(), key=lambda x: x[1], reverse=True)
+        sorted_types = type_counts.most_common()
         
         return {
             'counts': type_counts,
@@ -99,18 +142,35 @@ class TrendAnalyzer:
             return {'average': 0.0, 'min': 0.0, 'max': 0.0, 'distribution': {}}
         
         confidence_scores = [anomaly.confidence_score for anomaly in anomalies]
+        # Summed in the original order so the average is unchanged by the sort
+        confidence_sum = sum(confidence_scores)
         
-        # Confidence distribution buckets
+        # Once sorted, the extremes are at the ends and each bucket boundary
+        # is a binary search, instead of three more passes over the scores
+        confidence_scores.sort()
+        medium_start = bisect_left(confidence_scores, 0.5)
+        high_start = bisect_left(confidence_scores, 0.8)
         distribution = {
-            'high': len([s for s in confidence_scores if s >= 0.8]),
-            'medium': len([s for s in confidence_scores if 0.5 <= s < 0.8]),
-            'low': len([s for s in confidence_scores if s < 0.5])
+            'high': len(confidence_scores) - high_start,
+            'medium': high_start - medium_start,
+            'low': medium_start
         }
         
+        return TrendAnalyzer._confidence_trends(
+            len(confidence_scores), confidence_sum, confidence_scores[0],
+            confidence_scores[-1], distribution)
+    
+    @staticmethod
+    def _confidence_trends(total: int, confidence_sum: float, confidence_min: float,
+                           confidence_max: float, distribution: Dict[str, int]) -> Dict[str, Any]:
+        """Build the confidence trend result from precomputed totals."""
+        if not total:
+            return {'average': 0.0, 'min': 0.0, 'max': 0.0, 'distribution': {}}
+        
         return {
-            'average': sum(confidence_scores) / len(confidence_scores),
-            'min': min(confidence_scores),
-            'max': max(confidence_scores),
+            'average': confidence_sum / total,
+            'min': confidence_min,
+            'max': confidence_max,
             'distribution': distribution
         }
 
@@ -118,10 +178,34 @@ class TrendAnalyzer:
 class EnhancedReportGenerator:
     """Generate comprehensive reports with advanced analytics."""
     
+    # Fixed JSON report metadata; generated_at is filled in per report
+    REPORT_METADATA = {
+        'report_type': 'business_logic_anomaly_detection',
+        'version': '1.0.0',
+        'generated_at': None,
+        'generator': 'Enhanced Business Logic Anomaly Detector'
+    }
+    
+    # Opening recommendation for each risk category from _categorize_risk
+    RISK_CATEGORY_RECOMMENDATIONS = {
+        'Critical': "Immediate security review required - critical vulnerabilities detected",
+        'High': "High-priority security issues require prompt attention",
+        'Medium': "Moderate security concerns should be addressed in next sprint"
+    }
+    
+    # Recommendation for each vulnerability type, in the order they are reported
+    VULNERABILITY_RECOMMENDATIONS = {
+        'unauthorized_access': "Review and strengthen authentication and authorization controls",
+        'privilege_escalation': "Audit user privilege assignments and access controls",
+        'parameter_tampering': "Implement robust input validation and parameter verification",
+        'sequence_manipulation': "Add sequence validation and state management controls"
+    }
+    
     def __init__(self, template_dir: str = "templates"):
         """Initialize the report generator."""
         self.template_dir = template_dir
-        self.env = Environment(loader=FileSystemLoader(template_dir))
+        self.env = _get_environment(template_dir)
+        self._html_template = None  # Resolved on first use
         self.risk_scorer = RiskScorer()
         self.trend_analyzer = TrendAnalyzer()
     
@@ -129,25 +213,64 @@ class EnhancedReportGenerator:
         """Generate enhanced summary with analytics."""
         # Basic counts
         total_anomalies = len(anomalies)
-        potential_vulnerabilities = len([a for a in anomalies if a.is_potential_vulnerability])
-        
-        # Severity breakdown
+        potential_vulnerabilities = 0
         severity_breakdown = {}
-        for anomaly in anomalies:
-            severity_breakdown[anomaly.severity] = severity_breakdown.get(anomaly.severity, 0) + 1
-        
-        # Type breakdown
         type_breakdown = {}
+        
+        # Accumulators for calculate_flow_risk and analyze_confidence_trends
+        total_weighted_score = 0.0
+        total_weight = 0.0
+        confidence_sum = 0.0
+        confidence_min = confidence_max = None
+        
+        # Gather every count and sum in a single pass over the anomalies. Each
+        # attribute is read once into a local, and the per-anomaly risk of
+        # RiskScorer.calculate_anomaly_risk is computed inline.
+        severity_weight = self.risk_scorer.SEVERITY_WEIGHTS.get
+        vulnerability_multiplier = self.risk_scorer.VULNERABILITY_MULTIPLIER
+        severity_count = severity_breakdown.get
+        type_count = type_breakdown.get
+        high = medium = low = 0
+        vulnerability_types = set()
         for anomaly in anomalies:
-            type_breakdown[anomaly.type] = type_breakdown.get(anomaly.type, 0) + 1
+            severity = anomaly.severity
+            anomaly_type = anomaly.type
+            score = anomaly.confidence_score
+            is_vulnerability = anomaly.is_potential_vulnerability
+            
+            severity_breakdown[severity] = severity_count(severity, 0) + 1
+            type_breakdown[anomaly_type] = type_count(anomaly_type, 0) + 1
+            if is_vulnerability:
+                potential_vulnerabilities += 1
+                if anomaly.vulnerability_type:
+                    vulnerability_types.add(anomaly.vulnerability_type)
+            
+            weight = severity_weight(severity, 1.0)
+            risk = min(10.0, weight * score * (vulnerability_multiplier if is_vulnerability else 1.0))
+            total_weighted_score += risk * weight
+            total_weight += weight
+            
+            confidence_sum += score
+            if confidence_min is None or score < confidence_min:
+                confidence_min = score
+            if confidence_max is None or score > confidence_max:
+                confidence_max = score
+            if score >= 0.8:
+                high += 1
+            elif 0.5 <= score < 0.8:
+                medium += 1
+            elif score < 0.5:
+                low += 1
+        distribution = {'high': high, 'medium': medium, 'low': low}
         
-        # Risk scoring
-        risk_score = self.risk_scorer.calculate_flow_risk(anomalies)
+        # Risk scoring, as in RiskScorer.calculate_flow_risk
+        risk_score = min(10.0, total_weighted_score / total_weight if total_weight > 0 else 0.0)
         
         # Trend analysis
-        severity_trends = self.trend_analyzer.analyze_severity_trends(anomalies)
-        type_trends = self.trend_analyzer.analyze_type_trends(anomalies)
-        confidence_trends = self.trend_analyzer.analyze_confidence_trends(anomalies)
+        severity_trends = self.trend_analyzer._severity_trends(Counter(severity_breakdown), total_anomalies)
+        type_trends = self.trend_analyzer._type_trends(Counter(type_breakdown))
+        confidence_trends = self.trend_analyzer._confidence_trends(
+            total_anomalies, confidence_sum, confidence_min, confidence_max, distribution)
         
         # Risk categorization
         risk_category = self._categorize_risk(risk_score)
@@ -164,7 +287,7 @@ class EnhancedReportGenerator:
                 'types': type_trends,
                 'confidence': confidence_trends
             },
-            'recommendations': self._generate_recommendations(anomalies, risk_score)
+            'recommendations': self._generate_recommendations(anomalies, risk_score, vulnerability_types)
         }
     
     def _categorize_risk(self, risk_score: float) -> str:
@@ -180,32 +303,28 @@ class EnhancedReportGenerator:
         else:
             return 'Minimal'
     
-    def _generate_recommendations(self, anomalies: List[AnomalyInfo], risk_score: float) -> List[str]:
-        """Generate contextual recommendations."""
+    def _generate_recommendations(self, anomalies: List[AnomalyInfo], risk_score: float,
+                                  vulnerability_types: Optional[set] = None) -> List[str]:
+        """Generate contextual recommendations. vulnerability_types is collected from anomalies if not given."""
         recommendations = []
         
         # Risk-based recommendations
-        if risk_score >= 8.0:
-            recommendations.append("Immediate security review required - critical vulnerabilities detected")
-        elif risk_score >= 6.0:
-            recommendations.append("High-priority security issues require prompt attention")
-        elif risk_score >= 4.0:
-            recommendations.append("Moderate security concerns should be addressed in next sprint")
+        risk_recommendation = self.RISK_CATEGORY_RECOMMENDATIONS.get(self._categorize_risk(risk_score))
+        if risk_recommendation:
+            recommendations.append(risk_recommendation)
         
         # Type-specific recommendations
-        vulnerability_types = set()
-        for anomaly in anomalies:
-            if anomaly.is_potential_vulnerability and anomaly.vulnerability_type:
-                vulnerability_types.add(anomaly.vulnerability_type)
-        
-        if 'unauthorized_access' in vulnerability_types:
-            recommendations.append("Review and strengthen authentication and authorization controls")
-        if 'privilege_escalation' in vulnerability_types:
-            recommendations.append("Audit user privilege assignments and access controls")
-        if 'parameter_tampering' in vulnerability_types:
-            recommendations.append("Implement robust input validation and parameter verification")
-        if 'sequence_manipulation' in vulnerability_types:
-            recommendations.append("Add sequence validation and state management controls")
+        if vulnerability_types is None:
+            vulnerability_types = {
+                anomaly.vulnerability_type for anomaly in anomalies
+                if anomaly.is_potential_vulnerability and anomaly.vulnerability_type
+            }
+        if vulnerability_types:
+            recommendations.extend(
+                recommendation
+                for vulnerability_type, recommendation in self.VULNERABILITY_RECOMMENDATIONS.items()
+                if vulnerability_type in vulnerability_types
+            )
         
         # General recommendations
         if len(anomalies) > 10:
@@ -218,16 +337,14 @@ class EnhancedReportGenerator:
     
     def generate_html_report(self, flow: FlowInfo, anomalies: List[AnomalyInfo]) -> str:
         """Generate comprehensive HTML report."""
-        template = self.env.get_template('report_template.html')
+        if self._html_template is None:
+            self._html_template = self.env.get_template('report_template.html')
+        template = self._html_template
         
         summary = self.generate_enhanced_summary(flow, anomalies)
         
         # Sort anomalies by severity and confidence
-        severity_order = {'Critical': 0, 'High': 1, 'Medium': 2, 'Low': 3, 'Info': 4}
-        sorted_anomalies = sorted(
-            anomalies,
-            key=lambda a: (severity_order.get(a.severity, 5), -a.confidence_score)
-        )
+        sorted_anomalies = sort_anomalies_by_severity(anomalies)
         
         return template.render(
             flow=flow,
@@ -243,19 +360,17 @@ class EnhancedReportGenerator:
         # Convert anomalies to dictionaries
         anomalies_data = []
         for anomaly in anomalies:
-            anomaly_dict = asdict(anomaly)
+            anomaly_dict = _anomaly_to_dict(anomaly)
             # Add computed risk score
             anomaly_dict['risk_score'] = self.risk_scorer.calculate_anomaly_risk(anomaly)
             anomalies_data.append(anomaly_dict)
         
+        metadata = dict(self.REPORT_METADATA)
+        metadata['generated_at'] = datetime.now().isoformat()
+        
         report_data = {
-            'metadata': {
-                'report_type': 'business_logic_anomaly_detection',
-                'version': '1.0.0',
-                'generated_at': datetime.now().isoformat(),
-                'generator': 'Enhanced Business Logic Anomaly Detector'
-            },
-            'flow': asdict(flow),
+            'metadata': metadata,
+            'flow': _flow_to_dict(flow),
             'summary': summary,
             'anomalies': anomalies_data,
             'analytics': {
@@ -265,7 +380,11 @@ class EnhancedReportGenerator:
             }
         }
         
-        return json.dumps(report_data, indent=2, default=str)
+        # Datetimes are passed to default=str to keep the str() format of the stdlib json output
+        return orjson.dumps(
+            report_data, default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATETIME
+        ).decode()
     
     def generate_executive_summary(self, flow: FlowInfo, anomalies: List[AnomalyInfo]) -> Dict[str, Any]:
         """Generate executive summary for dashboard."""
@@ -1,9 +1,12 @@
+import mimetypes
 import os
 import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+import orjson
 from flask import Flask, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from src.routes.flows import flows_bp
 from src.routes.recording import recording_bp
@@ -12,7 +15,29 @@ from src.routes.replay import replay_bp
 from src.routes.analysis import analysis_bp
 from src.routes.reports import reports_bp
 
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson for faster API responses."""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        # Dates keep Flask's HTTP date format through the default hook
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+# Served .js files need a JavaScript MIME type even where the system mimetypes
+# database lacks one; registered before the app serves anything
+mimetypes.add_type("application/javascript", ".js")
+
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = 'anomaly_detector_secret_key_2024'
 
 # Enable CORS for all routes
@@ -25,7 +50,6 @@ app.register_blueprint(payloads_bp, url_prefix='/api')
 app.register_blueprint(replay_bp, url_prefix='/api')
 app.register_blueprint(analysis_bp, url_prefix='/api')
 app.register_blueprint(reports_bp, url_prefix='/api')
-from flask import Response
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -36,12 +60,8 @@ def serve(path):
 
     full_path = os.path.join(static_folder_path, path)
     if path != "" and os.path.exists(full_path):
-        if path.endswith('.js'):
-            with open(full_path, 'rb') as f:
-                content = f.read()
-            return Response(content, mimetype='application/javascript')
-        else:
-            return send_from_directory(static_folder_path, path)
+        # Streamed through the WSGI file wrapper rather than read into memory
+        return send_from_directory(static_folder_path, path)
     else:
         index_path = os.path.join(static_folder_path, 'index.html')
         if os.path.exists(index_path):
@@ -51,7 +71,8 @@ def serve(path):
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5002, debug=True)
-
-import mimetypes
-mimetypes.add_type("application/javascript", ".js")
+    if os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true'):
+        app.run(host='0.0.0.0', port=5002, debug=True)
+    else:
+        import waitress
+        waitress.serve(app, host='0.0.0.0', port=5002, threads=max(8, (os.cpu_count() or 1) * 2))
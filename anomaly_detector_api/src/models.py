@@ -4,11 +4,12 @@ Data models and DTOs for the Business Logic Anomaly Detector.
 
 from dataclasses import dataclass
 from datetime import datetime
+from operator import attrgetter
 from typing import Optional, Dict, List, Any
-import json
+import orjson
 
 
-@dataclass
+@dataclass(slots=True)
 class FlowInfo:
     """Data transfer object for flow information."""
     flow_id: int
@@ -19,7 +20,7 @@ class FlowInfo:
     request_count: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class RequestInfo:
     """Data transfer object for request information."""
     request_id: int
@@ -36,7 +37,7 @@ class RequestInfo:
     timestamp: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TestCaseInfo:
     """Data transfer object for test case information."""
     test_case_id: int
@@ -52,7 +53,7 @@ class TestCaseInfo:
     timestamp: Optional[datetime] = None # Changed from created_timestamp to timestamp
 
 
-@dataclass
+@dataclass(slots=True)
 class ReplayedResponseInfo:
     """Data transfer object for replayed response information."""
     response_id: int
@@ -65,7 +66,7 @@ class ReplayedResponseInfo:
     timestamp: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AnomalyInfo:
     """Data transfer object for anomaly information."""
     anomaly_id: int
@@ -84,7 +85,7 @@ class AnomalyInfo:
     created_timestamp: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionInfo:
     """Data transfer object for session information."""
     session_id: int
@@ -98,7 +99,7 @@ class SessionInfo:
     updated_timestamp: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class PayloadRuleInfo:
     """Data transfer object for payload rule information."""
     rule_id: int
@@ -152,30 +153,45 @@ class ConfigurationError(AnomalyDetectorError):
 
 def serialize_headers(headers: Dict[str, str]) -> str:
     """Serialize headers dictionary to JSON string."""
-    return json.dumps(headers) if headers else "{}"
+    return orjson.dumps(headers, option=orjson.OPT_NON_STR_KEYS).decode() if headers else "{}"
 
 
 def deserialize_headers(headers_str: str) -> Dict[str, str]:
     """Deserialize headers JSON string to dictionary."""
     try:
-        return json.loads(headers_str) if headers_str else {}
-    except json.JSONDecodeError:
+        return orjson.loads(headers_str) if headers_str else {}
+    except orjson.JSONDecodeError:
         return {}
 
 
 def serialize_session_data(data: Dict[str, Any]) -> str:
     """Serialize session data dictionary to JSON string."""
-    return json.dumps(data) if data else "{}"
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode() if data else "{}"
 
 
 def deserialize_session_data(data_str: str) -> Dict[str, Any]:
     """Deserialize session data JSON string to dictionary."""
     try:
-        return json.loads(data_str) if data_str else {}
-    except json.JSONDecodeError:
+        return orjson.loads(data_str) if data_str else {}
+    except orjson.JSONDecodeError:
         return {}
 
 
+def serialize_config_value(value: Any) -> str:
+    """Serialize a configuration value to JSON so its type survives storage."""
+    return orjson.dumps(value, default=str).decode()
+
+
+def deserialize_config_value(value_str: Optional[str]) -> Any:
+    """Deserialize a stored configuration value, accepting plain str() values from older databases."""
+    if value_str is None:
+        return None
+    try:
+        return orjson.loads(value_str)
+    except orjson.JSONDecodeError:
+        return {'True': True, 'False': False}.get(value_str, value_str)
+
+
 # Constants for anomaly types
 ANOMALY_TYPES = {
     'status_code_diff': 'Different HTTP status codes',
@@ -191,6 +207,28 @@ ANOMALY_TYPES = {
 # Constants for severity levels
 SEVERITY_LEVELS = ['Critical', 'High', 'Medium', 'Low', 'Info']
 
+# Integer rank of each severity level, most severe first
+SEVERITY_RANK = {severity: rank for rank, severity in enumerate(SEVERITY_LEVELS)}
+
+
+def sort_anomalies_by_severity(anomalies: List[AnomalyInfo]) -> List[AnomalyInfo]:
+    """Order anomalies most severe first, then by descending confidence; unknown severities go last."""
+    # Bucketing by rank and sorting each bucket on a C-level attrgetter key
+    # avoids calling a Python key function per anomaly. Both steps are stable,
+    # so ties keep their input order.
+    buckets = [[] for _ in range(len(SEVERITY_LEVELS) + 1)]
+    rank = SEVERITY_RANK.get
+    unknown_rank = len(SEVERITY_LEVELS)
+    for anomaly in anomalies:
+        buckets[rank(anomaly.severity, unknown_rank)].append(anomaly)
+
+    sorted_anomalies = []
+    confidence = attrgetter('confidence_score')
+    for bucket in buckets:
+        bucket.sort(key=confidence, reverse=True)
+        sorted_anomalies.extend(bucket)
+    return sorted_anomalies
+
 # Constants for payload categories
 PAYLOAD_CATEGORIES = {
     'numeric': 'Numeric value modifications',
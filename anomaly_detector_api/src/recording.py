@@ -3,10 +3,10 @@ Recording module for the Business Logic Anomaly Detector.
 Handles capturing HTTP traffic and storing it in the database.
 """
 
-import json
 import os
 from typing import Dict, Any, Optional
 from urllib.parse import urlparse
+import orjson
 
 from .database import DatabaseManager
 from .models import RecordingError, RequestInfo
@@ -88,8 +88,8 @@ class RecordingManager:
             raise RecordingError(f"HAR file not found: {har_file_path}")
         
         try:
-            with open(har_file_path, 'r', encoding='utf-8') as f:
-                har_data = json.load(f)
+            with open(har_file_path, 'rb') as f:
+                har_data = orjson.loads(f.read())
             
             entries = har_data.get("log", {}).get("entries", [])
             if not entries:
@@ -100,10 +100,8 @@ class RecordingManager:
             parsed_url = urlparse(first_url)
             target_domain = parsed_url.netloc
             
-            flow_id = self.db_manager.create_flow(flow_name, description, target_domain)
-            self.request_sequence_numbers[flow_id] = 0
-            
-            for entry in entries:
+            requests = []
+            for sequence_number, entry in enumerate(entries, start=1):
                 request = entry.get("request", {})
                 response = entry.get("response", {})
                 
@@ -118,11 +116,7 @@ class RecordingManager:
                 response_headers = {h["name"]: h["value"] for h in response.get("headers", [])}
                 response_content = response.get("content", {}).get("text", "").encode("utf-8")
                 
-                self.request_sequence_numbers[flow_id] += 1
-                sequence_number = self.request_sequence_numbers[flow_id]
-                
-                self.db_manager.add_request(
-                    flow_id=flow_id,
+                requests.append(dict(
                     sequence_number=sequence_number,
                     url=url,
                     method=method,
@@ -131,7 +125,15 @@ class RecordingManager:
                     response_status=response_status,
                     response_headers=response_headers,
                     response_content=response_content
-                )
+                ))
+            
+            # The flow and all of its requests are written in one transaction
+            with self.db_manager.transaction():
+                flow_id = self.db_manager.create_flow(flow_name, description, target_domain)
+                for request in requests:
+                    request["flow_id"] = flow_id
+                self.db_manager.add_requests(requests)
+            self.request_sequence_numbers[flow_id] = len(requests)
             
             return flow_id
         except Exception as e:
@@ -21,10 +21,21 @@ class ReplayManager:
     def __init__(self, db_manager: DatabaseManager):
         """Initialize with database manager."""
         self.db_manager = db_manager
-        self.client = httpx.AsyncClient(verify=False) # Disable SSL verification for testing
         self.rate_limit_rps = float(self.db_manager.get_config("max_concurrent_requests") or 10)
         self.request_delay_ms = int(self.db_manager.get_config("request_delay_ms") or 100)
         self.timeout_seconds = int(self.db_manager.get_config("timeout_seconds") or 30)
+        # One pooled HTTP/2 client for all replays, sized to the configured concurrency
+        self.client = httpx.AsyncClient(
+            verify=False, # Disable SSL verification for testing
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=max(1, int(self.rate_limit_rps * 2)),
+                max_connections=max(1, int(self.rate_limit_rps * 4))
+            ),
+            timeout=httpx.Timeout(self.timeout_seconds)
+        )
+        # Original requests shared by the test cases of the current replay run
+        self._request_cache: Dict[int, RequestInfo] = {}
     
     async def replay_flow(self, flow_id: int, max_concurrent: Optional[int] = None,
                           delay_ms: Optional[int] = None) -> int:
@@ -42,53 +53,72 @@ class ReplayManager:
                 requests_map[tc.request_id].append(tc)
             
             # Get original requests in sequence
-            original_requests = self.db_manager.get_requests(flow_id)
-            
-            replayed_count = 0
+            original_requests = self.db_manager.get_requests(flow_id, include_body=False)
             
             # Implement sequence manipulation here if needed
             # For now, replay in original request order, then all test cases for that request
+            ordered_test_cases = [
+                test_case
+                for original_req in original_requests
+                for test_case in requests_map.get(original_req.request_id, [])
+            ]
             
-            for original_req in original_requests:
-                if original_req.request_id in requests_map:
-                    for test_case in requests_map[original_req.request_id]:
-                        await self._execute_replay(test_case)
-                        replayed_count += 1
-                        await asyncio.sleep(self.request_delay_ms / 1000.0)
-            
-            return replayed_count
+            return await self._replay_concurrently(
+                ordered_test_cases, max_concurrent,
+                self.request_delay_ms if delay_ms is None else delay_ms
+            )
         except Exception as e:
             raise ReplayError(f"Failed to replay flow {flow_id}: {e}")
+        finally:
+            self._request_cache.clear()
     
     async def replay_test_cases(self, test_case_ids: List[int], max_concurrent: Optional[int] = None,
                                 delay_ms: Optional[int] = None) -> int:
         """Replay specific test cases. Returns count of replayed requests."""
         try:
-            replayed_count = 0
-            tasks = []
-            
-            for tc_id in test_case_ids:
-                test_cases = self.db_manager.get_test_cases(request_id=None, flow_id=None)
-                test_case = next((tc for tc in test_cases if tc.test_case_id == tc_id), None)
-                if test_case:
-                    tasks.append(self._execute_replay(test_case))
-                    replayed_count += 1
-            
-            if tasks:
-                # Use a semaphore for concurrency control
-                semaphore = asyncio.Semaphore(max_concurrent or self.rate_limit_rps)
-                async def limited_task(task):
-                    async with semaphore:
-                        return await task
-                await asyncio.gather(*[limited_task(task) for task in tasks])
-            
-            return replayed_count
+            test_cases = self.db_manager.get_test_cases_by_ids(test_case_ids)
+            return await self._replay_concurrently(test_cases, max_concurrent, delay_ms or 0)
         except Exception as e:
             raise ReplayError(f"Failed to replay specific test cases: {e}")
+        finally:
+            self._request_cache.clear()
+    
+    async def _replay_concurrently(self, test_cases: List[TestCaseInfo], max_concurrent: Optional[int],
+                                   delay_ms: float) -> int:
+        """Replay test cases concurrently, starting them in order at most once per delay_ms."""
+        if not test_cases:
+            return 0
+        # Use a semaphore for concurrency control
+        semaphore = asyncio.Semaphore(max(1, int(max_concurrent or self.rate_limit_rps)))
+        loop = asyncio.get_running_loop()
+        first_start = loop.time()
+        interval = delay_ms / 1000.0
+        
+        async def limited_replay(index: int, test_case: TestCaseInfo) -> ReplayedResponseInfo:
+            # Start times are spaced by the delay rather than waiting for each response first
+            wait = first_start + index * interval - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            async with semaphore:
+                return await self._execute_replay(test_case)
+        
+        # Every replay runs to completion so responses already in flight are stored;
+        # the first failure, in sequence order, is raised afterwards
+        results = await asyncio.gather(
+            *[limited_replay(i, tc) for i, tc in enumerate(test_cases)], return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return len(test_cases)
     
     async def _execute_replay(self, test_case: TestCaseInfo) -> ReplayedResponseInfo:
         """Execute a single replayed request and store the response."""
-        original_request = self.db_manager.get_request(test_case.request_id)
+        original_request = self._request_cache.get(test_case.request_id)
+        if original_request is None:
+            original_request = self.db_manager.get_request(test_case.request_id)
+            if original_request:
+                self._request_cache[test_case.request_id] = original_request
         if not original_request:
             raise ReplayError(f"Original request for test case {test_case.test_case_id} not found.")
         
@@ -97,23 +127,25 @@ class ReplayManager:
         body = test_case.modified_body or original_request.body
         method = original_request.method
         
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         try:
             response = await self.client.request(
                 method=method,
                 url=url,
                 headers=headers,
-                content=body,
-                timeout=self.timeout_seconds
+                content=body
             )
             
-            response_time_ms = int((time.time() - start_time) * 1000)
+            response_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            response_headers = dict(response.headers)
+            content = response.content
             
             response_id = self.db_manager.add_replayed_response(
                 test_case_id=test_case.test_case_id,
+                flow_id=test_case.flow_id,
                 status_code=response.status_code,
-                headers=dict(response.headers),
-                content=response.content,
+                headers=response_headers,
+                content=content,
                 response_time_ms=response_time_ms
             )
             
@@ -121,9 +153,9 @@ class ReplayManager:
                 response_id=response_id,
                 test_case_id=test_case.test_case_id,
                 status_code=response.status_code,
-                headers=dict(response.headers),
-                content_length=len(response.content),
-                content=response.content,
+                headers=response_headers,
+                content_length=len(content),
+                content=content,
                 response_time_ms=response_time_ms
             )
         except httpx.RequestError as e:
@@ -133,10 +165,11 @@ class ReplayManager:
             # Store a placeholder response indicating failure
             response_id = self.db_manager.add_replayed_response(
                 test_case_id=test_case.test_case_id,
+                flow_id=test_case.flow_id,
                 status_code=0, # Indicate error
                 headers={}, # Empty headers
                 content=error_msg.encode(),
-                response_time_ms=int((time.time() - start_time) * 1000)
+                response_time_ms=(time.perf_counter_ns() - start_ns) // 1_000_000
             )
             raise ReplayError(error_msg) from e
     
@@ -163,12 +196,13 @@ class ReplayManager:
     def set_rate_limit(self, requests_per_second: float) -> None:
         """Set rate limiting for requests."""
         self.rate_limit_rps = requests_per_second
-        self.db_manager.set_config("max_concurrent_requests", str(requests_per_second))
+        self.db_manager.set_config("max_concurrent_requests", requests_per_second)
     
     def set_timeout(self, timeout_seconds: int) -> None:
         """Set request timeout."""
         self.timeout_seconds = timeout_seconds
-        self.db_manager.set_config("timeout_seconds", str(timeout_seconds))
+        self.client.timeout = httpx.Timeout(timeout_seconds)
+        self.db_manager.set_config("timeout_seconds", timeout_seconds)
     
     async def __aenter__(self):
         """Async context manager entry."""
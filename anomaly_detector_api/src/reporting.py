@@ -5,12 +5,13 @@ Generates reports of findings in various formats.
 
 import json
 import csv
+from collections import Counter
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 from .database import DatabaseManager
-from .models import ReportingError, FlowInfo, AnomalyInfo
+from .models import ReportingError, FlowInfo, AnomalyInfo, sort_anomalies_by_severity
 
 
 class ReportGenerator:
@@ -79,8 +80,8 @@ class ReportGenerator:
             if not flow:
                 raise ReportingError(f"Flow {flow_id} not found")
             
-            requests = self.db_manager.get_requests(flow_id)
-            test_cases = self.db_manager.get_test_cases(flow_id=flow_id)
+            requests = self.db_manager.get_request_rows(flow_id)
+            test_cases = self.db_manager.get_test_case_rows(flow_id=flow_id)
             anomalies = self.db_manager.get_anomalies(flow_id=flow_id)
             
             # Group test cases by request
@@ -100,9 +101,10 @@ class ReportGenerator:
             # Calculate statistics
             total_test_cases = len(test_cases)
             total_anomalies = len(anomalies)
-            high_severity_anomalies = len([a for a in anomalies if a.severity == 'High'])
-            critical_anomalies = len([a for a in anomalies if a.severity == 'Critical'])
-            potential_vulnerabilities = len([a for a in anomalies if a.is_potential_vulnerability])
+            severity_counts = Counter(a.severity for a in anomalies)
+            high_severity_anomalies = severity_counts['High']
+            critical_anomalies = severity_counts['Critical']
+            potential_vulnerabilities = sum(1 for a in anomalies if a.is_potential_vulnerability)
             
             report_data = {
                 'flow': {
@@ -168,8 +170,7 @@ class ReportGenerator:
                 report_data['requests'].append(request_data)
             
             # Add all anomalies (sorted by severity)
-            severity_order = {'Critical': 0, 'High': 1, 'Medium': 2, 'Low': 3, 'Info': 4}
-            sorted_anomalies = sorted(anomalies, key=lambda a: (severity_order.get(a.severity, 5), -a.confidence_score))
+            sorted_anomalies = sort_anomalies_by_severity(anomalies)
             
             for anomaly in sorted_anomalies:
                 anomaly_data = {
@@ -4,7 +4,7 @@ Flask routes for flow management.
 
 from flask import Blueprint, request, jsonify
 from src.database import DatabaseManager
-from src.models import DatabaseError
+from src.models import DatabaseError, deserialize_headers
 import os
 
 flows_bp = Blueprint('flows', __name__)
@@ -70,16 +70,16 @@ def get_flow(flow_id):
 def get_flow_requests(flow_id):
     """Get all requests for a flow."""
     try:
-        requests = db_manager.get_requests(flow_id)
+        requests = db_manager.get_request_rows(flow_id)
         return jsonify([{
             'request_id': req.request_id,
             'flow_id': req.flow_id,
             'sequence_number': req.sequence_number,
             'url': req.url,
             'method': req.method,
-            'headers': req.headers,
+            'headers': deserialize_headers(req.headers),
             'response_status': req.response_status,
-            'response_headers': req.response_headers,
+            'response_headers': deserialize_headers(req.response_headers),
             'response_content_length': req.response_content_length,
             'timestamp': req.timestamp.isoformat() if req.timestamp else None
         } for req in requests])
@@ -90,7 +90,7 @@ def get_flow_requests(flow_id):
 def get_flow_test_cases(flow_id):
     """Get all test cases for a flow."""
     try:
-        test_cases = db_manager.get_test_cases(flow_id=flow_id)
+        test_cases = db_manager.get_test_case_rows(flow_id=flow_id)
         return jsonify([{
             'test_case_id': tc.test_case_id,
             'flow_id': tc.flow_id,
@@ -100,7 +100,7 @@ def get_flow_test_cases(flow_id):
             'description': tc.description,
             'payload_value': tc.payload_value,
             'modified_url': tc.modified_url,
-            'modified_headers': tc.modified_headers,
+            'modified_headers': deserialize_headers(tc.modified_headers) if tc.modified_headers else None,
             'timestamp': tc.timestamp.isoformat() if tc.timestamp else None
         } for tc in test_cases])
     except DatabaseError as e:
@@ -35,7 +35,7 @@ def generate_payloads_for_request(request_id):
 def generate_payloads_for_flow(flow_id):
     """Generate payloads for all requests in a flow."""
     try:
-        requests = db_manager.get_requests(flow_id)
+        requests = db_manager.get_requests(flow_id, include_body=False)
         if not requests:
             return jsonify({'error': 'No requests found for this flow'}), 404
         
@@ -92,6 +92,7 @@ def add_payload_rule():
             enabled=data.get('enabled', True),
             description=data.get('description')
         )
+        payload_generator.invalidate_rules_cache()
         
         return jsonify({
             'rule_id': rule_id,
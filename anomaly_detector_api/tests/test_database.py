@@ -0,0 +1,219 @@
+"""
+Database storage tests for the Business Logic Anomaly Detector.
+"""
+
+import os
+import random
+import sys
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sqlalchemy import text
+
+from src.database import (
+    DatabaseManager, _pack_body, _unpack_body, _COMPRESSED_BODY_PREFIX, _COMPRESS_MIN_SIZE
+)
+
+
+class TestBodyPacking(unittest.TestCase):
+    """Test compression of stored request and response bodies."""
+    
+    def test_empty_bodies_pass_through(self):
+        """Test None and empty bodies are stored unchanged."""
+        self.assertIsNone(_pack_body(None))
+        self.assertIsNone(_unpack_body(None))
+        self.assertEqual(_pack_body(b""), b"")
+        self.assertEqual(_unpack_body(b""), b"")
+    
+    def test_small_body_round_trip(self):
+        """Test bodies under the size threshold are stored raw."""
+        body = b"a" * (_COMPRESS_MIN_SIZE - 1)
+        packed = _pack_body(body)
+        self.assertEqual(packed, body)
+        self.assertEqual(_unpack_body(packed), body)
+    
+    def test_compressible_body_round_trip(self):
+        """Test large compressible bodies are stored compressed."""
+        for size in (_COMPRESS_MIN_SIZE, 64 * 1024):
+            body = b'{"id": 1, "name": "item"}' * (size // 25 + 1)
+            packed = _pack_body(body)
+            self.assertTrue(packed.startswith(_COMPRESSED_BODY_PREFIX))
+            self.assertLess(len(packed), len(body))
+            self.assertEqual(_unpack_body(packed), body)
+    
+    def test_incompressible_body_round_trip(self):
+        """Test bodies that zlib cannot shrink are stored raw."""
+        body = random.Random(0).randbytes(4096)
+        packed = _pack_body(body)
+        self.assertEqual(packed, body)
+        self.assertEqual(_unpack_body(packed), body)
+    
+    def test_body_starting_with_prefix_round_trip(self):
+        """Test raw bodies that begin with the compression prefix survive storage."""
+        for body in (_COMPRESSED_BODY_PREFIX, _COMPRESSED_BODY_PREFIX + b"short",
+                     _COMPRESSED_BODY_PREFIX + random.Random(1).randbytes(1024)):
+            packed = _pack_body(body)
+            self.assertNotEqual(packed, body)
+            self.assertEqual(_unpack_body(packed), body)
+    
+    def test_legacy_unprefixed_body(self):
+        """Test bodies written before compression are returned as stored."""
+        for body in (b"plain", b'{"legacy": true}' * 100):
+            self.assertEqual(_unpack_body(body), body)
+    
+    def test_database_round_trip(self):
+        """Test bodies read back through DatabaseManager match what was stored."""
+        db_manager = DatabaseManager("sqlite://")
+        flow_id = db_manager.create_flow("Body Flow")
+        bodies = [None, b"small", b"x" * 4096, random.Random(2).randbytes(2048),
+                  _COMPRESSED_BODY_PREFIX + b"raw"]
+        for sequence_number, body in enumerate(bodies, start=1):
+            request_id = db_manager.add_request(
+                flow_id, sequence_number, "https://example.com/api", "POST",
+                {}, body, 200, {}, body
+            )
+            request = db_manager.get_request(request_id)
+            self.assertEqual(request.body, body)
+            self.assertEqual(request.response_content, body)
+            self.assertEqual(request.response_content_length, len(body) if body else 0)
+        
+        # Rows stored before compression was introduced carry no prefix
+        with db_manager.transaction() as session:
+            session.execute(text(
+                "UPDATE requests SET body = :body, response_content = :body WHERE request_id = :request_id"
+            ), {"body": b"legacy body", "request_id": request_id})
+        request = db_manager.get_request(request_id)
+        self.assertEqual(request.body, b"legacy body")
+        self.assertEqual(request.response_content, b"legacy body")
+
+
+class TestBulkInsert(unittest.TestCase):
+    """Test batched inserts return the IDs of the rows they wrote."""
+    
+    def setUp(self):
+        """Set up an in-memory database with a row already in each table."""
+        self.db_manager = DatabaseManager("sqlite://")
+        self.flow_id = self.db_manager.create_flow("Bulk Flow")
+        # Existing rows make the batch IDs start past 1
+        existing_request_id = self.db_manager.add_request(
+            self.flow_id, 0, "https://example.com/existing", "GET", {}, None, 200, {}, None
+        )
+        self.db_manager.add_test_case(
+            self.flow_id, existing_request_id, "existing", "numeric", "Existing", "0"
+        )
+    
+    def test_add_requests_ids(self):
+        """Test add_requests returns IDs that map to the rows in input order."""
+        requests = [dict(
+            flow_id=self.flow_id,
+            sequence_number=sequence_number,
+            url=f"https://example.com/item/{sequence_number}",
+            method="POST" if sequence_number % 2 else "GET",
+            headers={"X-Seq": str(sequence_number)},
+            body=f"body {sequence_number}".encode(),
+            response_status=200 + sequence_number,
+            response_headers={"Content-Type": "text/plain"},
+            response_content=b"r" * sequence_number
+        ) for sequence_number in range(1, 6)]
+        request_ids = self.db_manager.add_requests(requests)
+        
+        self.assertEqual(len(request_ids), len(requests))
+        self.assertEqual(request_ids, sorted(set(request_ids)))
+        for request_id, expected in zip(request_ids, requests):
+            request = self.db_manager.get_request(request_id)
+            self.assertEqual(request.flow_id, self.flow_id)
+            self.assertEqual(request.sequence_number, expected['sequence_number'])
+            self.assertEqual(request.url, expected['url'])
+            self.assertEqual(request.method, expected['method'])
+            self.assertEqual(request.headers, expected['headers'])
+            self.assertEqual(request.body, expected['body'])
+            self.assertEqual(request.response_status, expected['response_status'])
+            self.assertEqual(request.response_headers, expected['response_headers'])
+            self.assertEqual(request.response_content, expected['response_content'])
+            self.assertEqual(request.response_content_length, expected['sequence_number'])
+            self.assertIsInstance(request.timestamp, datetime)
+        
+        ordered = [req.request_id for req in self.db_manager.get_requests(self.flow_id)]
+        self.assertEqual(ordered[1:], request_ids)
+    
+    def test_add_test_cases_ids(self):
+        """Test add_test_cases returns IDs that map to the rows in input order."""
+        request_ids = self.db_manager.add_requests([dict(
+            flow_id=self.flow_id, sequence_number=sequence_number,
+            url=f"https://example.com/{sequence_number}", method="GET", headers={}, body=None,
+            response_status=200, response_headers={}, response_content=None
+        ) for sequence_number in (1, 2)])
+        test_cases = [dict(
+            flow_id=self.flow_id,
+            request_id=request_ids[index % 2],
+            type=f"rule_{index}",
+            category="parameter",
+            description=f"Test case {index}",
+            payload_value=str(index),
+            modified_url=f"https://example.com/?id={index}",
+            modified_headers={"X-Index": str(index)} if index % 2 else None,
+            modified_body=f"modified {index}".encode() if index % 3 else None
+        ) for index in range(7)]
+        test_case_ids = self.db_manager.add_test_cases(test_cases)
+        
+        self.assertEqual(len(test_case_ids), len(test_cases))
+        self.assertEqual(test_case_ids, sorted(set(test_case_ids)))
+        stored = self.db_manager.get_test_cases_by_ids(test_case_ids)
+        self.assertEqual([tc.test_case_id for tc in stored], test_case_ids)
+        for test_case, expected in zip(stored, test_cases):
+            self.assertEqual(test_case.flow_id, self.flow_id)
+            self.assertEqual(test_case.request_id, expected['request_id'])
+            self.assertEqual(test_case.type, expected['type'])
+            self.assertEqual(test_case.category, expected['category'])
+            self.assertEqual(test_case.description, expected['description'])
+            self.assertEqual(test_case.payload_value, expected['payload_value'])
+            self.assertEqual(test_case.modified_url, expected['modified_url'])
+            self.assertEqual(test_case.modified_headers, expected['modified_headers'])
+            self.assertEqual(test_case.modified_body, expected['modified_body'])
+            self.assertIsInstance(test_case.timestamp, datetime)
+    
+    def test_add_test_cases_in_transaction(self):
+        """Test IDs stay correct when batches share one transaction."""
+        with self.db_manager.transaction():
+            first_ids = self.db_manager.add_test_cases([dict(
+                flow_id=self.flow_id, request_id=1, type="first", category="numeric",
+                description="First", payload_value=str(index)
+            ) for index in range(3)])
+            second_ids = self.db_manager.add_test_cases([dict(
+                flow_id=self.flow_id, request_id=1, type="second", category="numeric",
+                description="Second", payload_value=str(index)
+            ) for index in range(3)])
+        stored = self.db_manager.get_test_cases_by_ids(first_ids + second_ids)
+        self.assertEqual([tc.type for tc in stored], ["first"] * 3 + ["second"] * 3)
+        self.assertEqual([tc.payload_value for tc in stored], ["0", "1", "2"] * 2)
+
+
+
+class TestConfiguration(unittest.TestCase):
+    """Test configuration writes."""
+    
+    def _assert_set_configs(self, db_manager):
+        """Write new and existing keys and check a fresh read returns them with their types."""
+        db_manager.set_configs({"timeout_seconds": 30, "verify_ssl": False})
+        db_manager.set_configs({"timeout_seconds": 45, "user_agent": "replayer"})
+        db_manager._config_cache = None
+        self.assertEqual(db_manager.get_all_config(),
+                         {"timeout_seconds": 45, "verify_ssl": False, "user_agent": "replayer"})
+    
+    def test_set_configs_upsert(self):
+        """Test set_configs inserts and updates keys with the SQLite upsert."""
+        self._assert_set_configs(DatabaseManager("sqlite://"))
+    
+    def test_set_configs_without_upsert(self):
+        """Test set_configs falls back to update-or-add on engines without a known upsert."""
+        db_manager = DatabaseManager("sqlite://")
+        with patch.object(db_manager.engine.dialect, "name", "mysql"):
+            self._assert_set_configs(db_manager)
+
+
+if __name__ == '__main__':
+    unittest.main()
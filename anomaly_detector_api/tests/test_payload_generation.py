@@ -0,0 +1,168 @@
+"""
+Payload generation tests for the Business Logic Anomaly Detector.
+"""
+
+import json
+import os
+import sys
+import unittest
+
+import orjson
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.database import DatabaseManager
+from src.payload_generation import PayloadGenerator, _encode_json_leaves
+
+
+JSON_BODIES = [
+    {"user_id": 42, "name": "alice", "active": True, "score": 2.5, "note": None},
+    {"order": {"items": [{"id": 1, "qty": 3}, {"id": 2, "qty": 0.5}], "coupon": None},
+     "flags": [True, False, "true", "0"], "tags": []},
+    [1, "two", [3.25, {"deep": [False, None, -7]}], {}],
+    {"名前": "Zoë ü \"quoted\" \\ slash", "emoji": "🙂", "ключ": {"значение": 1e-7}},
+    {"big": 2 ** 62, "negative_big": -2 ** 62, "unsigned": 2 ** 63, "ratio": 1e20},
+    {"a": {"b": {"c": {"d": {"e": [[["leaf", 0]]]}}}}},
+]
+
+
+def _leaves(data, path=()):
+    """Yield (path, value) for every scalar leaf of a JSON value, depth first."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _leaves(value, path + (key,))
+    elif isinstance(data, list):
+        for index, value in enumerate(data):
+            yield from _leaves(value, path + (index,))
+    else:
+        yield path, data
+
+
+def _path_string(path):
+    """Format a leaf path the way test case descriptions name it."""
+    text = ''
+    for key in path:
+        if isinstance(key, int):
+            text += f"[{key}]"
+        else:
+            text = f"{text}.{key}" if text else key
+    return text
+
+
+def _replace_leaf(data, path, value):
+    """Return a copy of a JSON value with the leaf at path replaced."""
+    if not path:
+        return value
+    copy = orjson.loads(orjson.dumps(data))
+    container = copy
+    for key in path[:-1]:
+        container = container[key]
+    container[path[-1]] = value
+    return copy
+
+
+class TestEncodeJsonLeaves(unittest.TestCase):
+    """Test the leaf-recording JSON encoder."""
+    
+    def test_encoding_matches_orjson(self):
+        """Test the encoded bytes are identical to orjson.dumps."""
+        for body in JSON_BODIES:
+            encoded, leaf_spans = _encode_json_leaves(body)
+            self.assertEqual(encoded, orjson.dumps(body))
+            self.assertEqual(len(leaf_spans), len(list(_leaves(body))))
+    
+    def test_leaf_spans_cover_leaf_values(self):
+        """Test each recorded span holds the encoding of the leaf visited at that position."""
+        for body in JSON_BODIES:
+            encoded, leaf_spans = _encode_json_leaves(body)
+            for (path, value), (start, end) in zip(_leaves(body), leaf_spans):
+                self.assertEqual(encoded[start:end], orjson.dumps(value), path)
+
+
+class TestJsonBodyPayloads(unittest.TestCase):
+    """Test modified JSON bodies generated for recorded requests."""
+    
+    def setUp(self):
+        """Set up an in-memory database and payload generator."""
+        self.db_manager = DatabaseManager("sqlite://")
+        self.payload_generator = PayloadGenerator(self.db_manager)
+        self.flow_id = self.db_manager.create_flow("JSON Flow")
+    
+    def _generate(self, body):
+        """Record a JSON request (a value or raw bytes) and return the test cases that modify its body."""
+        request_id = self.db_manager.add_request(
+            self.flow_id, 1, "https://example.com/api/orders", "POST",
+            {"Content-Type": "application/json"},
+            body if isinstance(body, bytes) else orjson.dumps(body), 200, {}, b"{}"
+        )
+        self.payload_generator.generate_for_request(request_id)
+        return [tc for tc in self.db_manager.get_test_cases(request_id=request_id)
+                if tc.modified_body is not None]
+    
+    def test_spliced_bodies_replace_one_leaf(self):
+        """Test every modified body equals orjson.dumps of the body with one leaf replaced."""
+        for body in JSON_BODIES:
+            test_cases = self._generate(body)
+            self.assertTrue(test_cases, body)
+            original_leaves = list(_leaves(body))
+            for test_case in test_cases:
+                modified = orjson.loads(test_case.modified_body)
+                modified_leaves = list(_leaves(modified))
+                self.assertEqual([path for path, _ in modified_leaves],
+                                 [path for path, _ in original_leaves])
+                # Compare types too, since True == 1 and 1 == 1.0
+                changed = [
+                    (path, new_value)
+                    for (path, old_value), (_, new_value) in zip(original_leaves, modified_leaves)
+                    if type(old_value) is not type(new_value) or old_value != new_value
+                ]
+                self.assertLessEqual(len(changed), 1, test_case.description)
+                expected = body
+                if changed:
+                    path, new_value = changed[0]
+                    # The splice must land on the leaf the test case was generated for
+                    self.assertIn(f"Changed {_path_string(path)} from ", test_case.description)
+                    expected = _replace_leaf(body, path, new_value)
+                self.assertEqual(test_case.modified_body, orjson.dumps(expected), test_case.description)
+    
+    def test_wide_integers_stay_exact(self):
+        """Test integers wider than 64 bits are not rewritten as floats in modified bodies."""
+        raw_body = (b'{"account": 123456789012345678901234567890, "amount": 5, '
+                    b'"items": [{"id": -98765432109876543210987654321, "sku": "A-1"}]}')
+        original_leaves = list(_leaves(json.loads(raw_body)))
+        test_cases = self._generate(raw_body)
+        self.assertTrue(test_cases)
+        for test_case in test_cases:
+            modified_leaves = list(_leaves(json.loads(test_case.modified_body)))
+            unchanged = [
+                path for (path, old_value), (_, new_value) in zip(original_leaves, modified_leaves)
+                if type(old_value) is type(new_value) and old_value == new_value
+            ]
+            self.assertGreaterEqual(len(unchanged), len(original_leaves) - 1, test_case.description)
+            if ("account",) in unchanged:
+                self.assertIn(b"123456789012345678901234567890", test_case.modified_body)
+        self.assertTrue(any(
+            "Changed account from 123456789012345678901234567890 to 123456789012345678901234567891"
+            in test_case.description for test_case in test_cases
+        ))
+    
+    def test_deeply_nested_body(self):
+        """Test bodies nested close to orjson's depth limit are walked without recursion errors."""
+        depth = 1019
+        for leaf in (b'{"id": 7}', b'{"id": 1234567890123456789012}'):
+            raw_body = b'[' * depth + leaf + b']' * depth
+            test_cases = self._generate(raw_body)
+            self.assertTrue(test_cases, leaf)
+            for test_case in test_cases:
+                self.assertTrue(test_case.modified_body.startswith(b'[' * depth + b'{"id":'))
+                self.assertTrue(test_case.modified_body.endswith(b'}' + b']' * depth))
+                self.assertIn(f"Changed {'[0]' * depth}.id from ", test_case.description)
+    
+    def test_scalar_body_is_ignored(self):
+        """Test a JSON body without an object or array produces no body payloads."""
+        self.assertEqual(self._generate("just a string"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Replay tests for the Business Logic Anomaly Detector.
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import Mock
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.models import TestCaseInfo, ReplayError
+from src.replay import ReplayManager
+
+
+def _make_test_cases(count):
+    """Build test cases for one recorded request."""
+    return [TestCaseInfo(
+        test_case_id=index, flow_id=1, request_id=1, type="id_increment",
+        category="numeric", description=f"Test case {index}", payload_value=str(index)
+    ) for index in range(count)]
+
+
+class TestConcurrentReplay(unittest.TestCase):
+    """Test concurrent replay of several test cases."""
+    
+    def setUp(self):
+        """Set up a replay manager with a stubbed database and request executor."""
+        db_manager = Mock()
+        db_manager.get_config.return_value = None
+        self.replay_manager = ReplayManager(db_manager)
+        self.started = []
+        self.finished = []
+        self.running = 0
+        self.peak_running = 0
+    
+    def tearDown(self):
+        """Close the replay manager's HTTP client."""
+        asyncio.run(self.replay_manager.client.aclose())
+    
+    def _stub_execute_replay(self, failing_ids=(), fail_after=0.01, duration=0.05):
+        """Replace _execute_replay with a stub that sleeps and fails for failing_ids."""
+        async def execute_replay(test_case):
+            self.started.append(test_case.test_case_id)
+            self.running += 1
+            self.peak_running = max(self.peak_running, self.running)
+            try:
+                if test_case.test_case_id in failing_ids:
+                    await asyncio.sleep(fail_after)
+                    raise ReplayError(f"Request failed for test case {test_case.test_case_id}")
+                await asyncio.sleep(duration)
+                self.finished.append(test_case.test_case_id)
+            finally:
+                self.running -= 1
+        self.replay_manager._execute_replay = execute_replay
+    
+    def test_replays_all_test_cases(self):
+        """Test every test case is replayed in order within the concurrency limit."""
+        test_cases = _make_test_cases(8)
+        self.replay_manager.db_manager.get_test_cases_by_ids.return_value = test_cases
+        self._stub_execute_replay()
+        
+        replayed_count = asyncio.run(self.replay_manager.replay_test_cases(
+            [tc.test_case_id for tc in test_cases], max_concurrent=3))
+        
+        self.assertEqual(replayed_count, 8)
+        self.assertEqual(self.started, list(range(8)))
+        self.assertEqual(sorted(self.finished), list(range(8)))
+        self.assertEqual(self.peak_running, 3)
+    
+    def test_failure_waits_for_other_replays(self):
+        """Test a failing replay does not abandon replays still in flight or not yet started."""
+        test_cases = _make_test_cases(6)
+        self.replay_manager.db_manager.get_test_cases_by_ids.return_value = test_cases
+        self._stub_execute_replay(failing_ids={0}, fail_after=0.01, duration=0.2)
+        
+        with self.assertRaises(ReplayError) as context:
+            asyncio.run(self.replay_manager.replay_test_cases(
+                [tc.test_case_id for tc in test_cases], max_concurrent=3))
+        
+        self.assertIn("test case 0", str(context.exception))
+        self.assertEqual(sorted(self.finished), [1, 2, 3, 4, 5])
+    
+    def test_first_failure_in_sequence_order_is_raised(self):
+        """Test the earliest failing test case in sequence order is reported."""
+        test_cases = _make_test_cases(4)
+        self.replay_manager.db_manager.get_test_cases_by_ids.return_value = test_cases
+        self._stub_execute_replay(failing_ids={1, 3}, fail_after=0.01)
+        
+        with self.assertRaises(ReplayError) as context:
+            asyncio.run(self.replay_manager.replay_test_cases([tc.test_case_id for tc in test_cases]))
+        
+        self.assertIn("test case 1", str(context.exception))
+        self.assertEqual(sorted(self.finished), [0, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
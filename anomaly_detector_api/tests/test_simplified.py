@@ -222,6 +222,10 @@ class TestVisualizationDataProcessor(unittest.TestCase):
         self.assertIn('severities', heatmap_data)
         self.assertIn('max_count', heatmap_data)
         
+        self.assertEqual(len(heatmap_data['data']), 3)
+        self.assertEqual(heatmap_data['data'][0]['type'], 'Unauthorized Access')
+        self.assertEqual(heatmap_data['max_count'], 1)
+        
         # Check data structure
         for row in heatmap_data['data']:
             self.assertIn('type', row)
@@ -266,6 +270,12 @@ class TestVisualizationDataProcessor(unittest.TestCase):
         for bucket in expected_buckets:
             self.assertIn(bucket, risk_data['risk_buckets'])
         
+        self.assertEqual(risk_data['risk_buckets']['Critical Risk'], 2)  # Critical, High + vuln
+        self.assertEqual(risk_data['risk_buckets']['High Risk'], 0)
+        self.assertEqual(risk_data['risk_buckets']['Medium Risk'], 1)
+        self.assertEqual(risk_data['risk_buckets']['Low Risk'], 1)
+        self.assertEqual(risk_data['risk_buckets']['Minimal Risk'], 0)
+        
         # Check vulnerability types
         self.assertEqual(risk_data['vulnerability_types']['unauthorized_access'], 1)
         self.assertEqual(risk_data['vulnerability_types']['parameter_tampering'], 1)
@@ -322,6 +332,50 @@ class TestVisualizationDataProcessor(unittest.TestCase):
         self.assertEqual(summary['total_period'], 15)
         self.assertIn(summary['trend_direction'], ['increasing', 'decreasing', 'stable'])
 
+    def test_trend_moving_average(self):
+        """Test 7-day moving averages over the trend window."""
+        anomalies = []
+        base_date = datetime.now()
+        
+        for i in range(20):
+            for _ in range(i % 5):
+                anomalies.append({
+                    'created_timestamp': (base_date - timedelta(days=i)).isoformat(),
+                    'severity': 'High',
+                    'is_potential_vulnerability': i % 2 == 0
+                })
+        
+        trend_data = self.processor.prepare_trend_analysis_data(anomalies, days=20)
+        daily_data = trend_data['daily_data']
+        
+        for i, day_data in enumerate(daily_data):
+            window = daily_data[max(0, i - 6):i + 1]
+            self.assertAlmostEqual(day_data['moving_avg_total'],
+                                   sum(d['total'] for d in window) / len(window))
+            self.assertAlmostEqual(day_data['moving_avg_vulnerabilities'],
+                                   sum(d['vulnerabilities'] for d in window) / len(window))
+        
+        summary = trend_data['summary']
+        self.assertEqual(summary['total_anomalies'], sum(d['total'] for d in daily_data))
+        self.assertEqual(summary['total_vulnerabilities'], sum(d['vulnerabilities'] for d in daily_data))
+        self.assertIs(summary['peak_day'], max(daily_data, key=lambda x: x['total']))
+    
+    def test_trend_severity_case(self):
+        """Test trend severity counts ignore the case of stored severities."""
+        timestamp = datetime.now().isoformat()
+        anomalies = [
+            {'created_timestamp': timestamp, 'severity': severity, 'is_potential_vulnerability': False}
+            for severity in ['High', 'high', 'HIGH', 'critical', 'Medium', 'low', 'Info', 'unknown']
+        ]
+        
+        today = self.processor.prepare_trend_analysis_data(anomalies, days=7)['daily_data'][-1]
+        
+        self.assertEqual(today['total'], 8)
+        self.assertEqual(today['critical'], 1)
+        self.assertEqual(today['high'], 3)
+        self.assertEqual(today['medium'], 1)
+        self.assertEqual(today['low'], 1)
+
 
 class TestChartConfigGenerator(unittest.TestCase):
     """Test chart configuration generation."""